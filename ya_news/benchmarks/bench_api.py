@@ -0,0 +1,75 @@
+"""
+JSON API против HTML-страниц на одних и тех же данных.
+
+Данные создаются командой seed во временном файле SQLite, как
+в bench_views. Для каждой пары печатаются запросы в секунду по медиане,
+пик памяти на запрос и размер ответа. Запуск из каталога ya_news:
+
+    python -m benchmarks.bench_api --size medium
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_views import SIZES, UNTIL
+from benchmarks.common import profile_view, setup_django
+
+
+def pairs(client):
+    from django.urls import reverse
+
+    from news.models import News
+
+    hot = News.objects.first()
+    return {
+        'список': (
+            lambda: client.get(reverse('news:home')),
+            lambda: client.get(reverse('news:api_list')),
+        ),
+        'список, id и title': (
+            lambda: client.get(reverse('news:home')),
+            lambda: client.get(
+                reverse('news:api_list'), {'fields': 'id,title'}
+            ),
+        ),
+        'новость': (
+            lambda: client.get(reverse('news:detail', args=(hot.pk,))),
+            lambda: client.get(reverse('news:api_detail', args=(hot.pk,))),
+        ),
+    }
+
+
+def report(name, kind, result, size):
+    print(
+        f'{name:>20} {kind:>4}: {1e3 / result["p50_ms"]:8.0f} запр/с, '
+        f'{result["queries"]:2} SQL, {result["peak_kib"]:8.1f} KiB, '
+        f'ответ {size / 1024:7.1f} KiB'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'bench.sqlite3')
+        from django.core.management import call_command
+        from django.test import Client
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()
+        call_command('migrate', verbosity=0)
+        call_command(
+            'seed', until=UNTIL, stdout=sys.stderr, **SIZES[args.size]
+        )
+        for name, (html, api) in pairs(Client()).items():
+            for kind, request in (('html', html), ('json', api)):
+                result = profile_view(request, args.repeat)
+                report(name, kind, result, len(request().content))
+
+
+if __name__ == '__main__':
+    main()
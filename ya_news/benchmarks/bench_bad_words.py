@@ -0,0 +1,61 @@
+"""
+Сравнение проверки комментариев на запрещённые слова.
+
+Запуск из каталога ya_news:
+
+    python -m benchmarks.bench_bad_words
+"""
+import argparse
+import random
+import timeit
+
+from news.moderation import WordMatcher
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+SIZES = (10, 1_000, 10_000)
+
+
+def substring_loop(words, text):
+    """Прежняя проверка: отдельный поиск подстроки для каждого слова."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+def random_words(rng, count):
+    return [
+        ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(5, 10)))
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--text-length', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Чистый текст — худший случай: обе проверки просматривают его целиком.
+    text = ' '.join(random_words(rng, args.text_length // 8))
+    print(f'{"words":>8} {"loop, µs":>12} {"automaton, µs":>14} '
+          f'{"build, ms":>10}')
+    for size in SIZES:
+        words = random_words(rng, size)
+        build = timeit.timeit(lambda: WordMatcher(words), number=1)
+        matcher = WordMatcher(words)
+        loop = timeit.timeit(
+            lambda: substring_loop(words, text), number=args.repeat
+        )
+        automaton = timeit.timeit(
+            lambda: matcher.search(text), number=args.repeat
+        )
+        print(f'{size:>8} {loop / args.repeat * 1e6:>12.1f} '
+              f'{automaton / args.repeat * 1e6:>14.1f} {build * 1e3:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Планы и время запросов новостей до и после индексов из миграций.
+
+Данные генерируются во временном файле SQLite. Запуск из каталога
+ya_news:
+
+    python -m benchmarks.bench_indexes --news 1000000 --comments 10000000
+"""
+import argparse
+import random
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from benchmarks.common import measure, setup_django, summary
+
+BATCH_SIZE = 50_000
+
+
+def seed(connection, news_total, comments_total, rng):
+    start_date = date(2000, 1, 1)
+    start_time = datetime(2020, 1, 1)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO auth_user (id, password, is_superuser, username, "
+            "first_name, last_name, email, is_staff, is_active, "
+            "date_joined) VALUES (1, '!', 0, 'bench', '', '', '', 0, 1, "
+            "'2020-01-01 00:00:00')"
+        )
+        for first in range(1, news_total + 1, BATCH_SIZE):
+            cursor.executemany(
+                'INSERT INTO news_news (id, title, text, date, '
+                'comment_count, version) VALUES (%s, %s, %s, %s, 0, 1)',
+                [
+                    (pk, f'News {pk}', 'News text',
+                     start_date + timedelta(days=rng.randrange(9000)))
+                    for pk in range(
+                        first, min(first + BATCH_SIZE, news_total + 1)
+                    )
+                ],
+            )
+        for first in range(1, comments_total + 1, BATCH_SIZE):
+            cursor.executemany(
+                'INSERT INTO news_comment (id, news_id, author_id, text, '
+                'created, modified, is_hidden) '
+                'VALUES (%s, %s, 1, %s, %s, %s, 0)',
+                [
+                    (pk,
+                     # Несколько «горячих» новостей собирают большую
+                     # часть комментариев.
+                     min(int(rng.paretovariate(1.2)), news_total),
+                     'Comment text',
+                     start_time + timedelta(seconds=pk),
+                     start_time + timedelta(seconds=pk))
+                    for pk in range(
+                        first, min(first + BATCH_SIZE, comments_total + 1)
+                    )
+                ],
+            )
+
+
+def queries():
+    from django.conf import settings
+
+    from news.models import Comment, News
+
+    hot_news = 1
+    middle = Comment.objects.filter(news_id=hot_news).order_by(
+        'created', 'id'
+    ).values_list('created', 'id')[1000:1001].get()
+    return {
+        'home page': lambda: list(
+            News.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        ),
+        'first comment page': lambda: list(
+            Comment.objects.filter(news_id=hot_news)
+            .order_by('created', 'id')[:settings.COMMENTS_PER_PAGE]
+        ),
+        'keyset comment page': lambda: list(
+            Comment.objects.filter(
+                news_id=hot_news, created__gt=middle[0]
+            ).order_by('created', 'id')[:settings.COMMENTS_PER_PAGE]
+        ),
+    }
+
+
+captured_sql = []
+captured_params = []
+
+
+def capture_sql(execute, sql, params, many, context):
+    captured_sql.append(sql)
+    captured_params.append(params)
+    return execute(sql, params, many, context)
+
+
+def report(connection, title, repeat):
+    print(f'\n== {title}')
+    for name, query in queries().items():
+        with connection.execute_wrapper(capture_sql):
+            query()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN ' + captured_sql[-1], captured_params[-1]
+            )
+            plan = '; '.join(row[-1] for row in cursor.fetchall())
+        print(f'{name:>20}: {summary(measure(query, repeat))}')
+        print(f'{"":>20}  {plan}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--news', type=int, default=1_000_000)
+    parser.add_argument('--comments', type=int, default=10_000_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'bench.sqlite3')
+        from django.core.management import call_command
+        from django.db import connection, transaction
+
+        from news.models import Comment, News
+
+        call_command('migrate', verbosity=0)
+        indexes = [
+            (model, index)
+            for model in (News, Comment)
+            for index in model._meta.indexes
+        ]
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.remove_index(model, index)
+        with transaction.atomic():
+            seed(connection, args.news, args.comments,
+                 random.Random(args.seed))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        report(connection, 'without indexes', args.repeat)
+
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.add_index(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        report(connection, 'with indexes', args.repeat)
+
+
+if __name__ == '__main__':
+    main()
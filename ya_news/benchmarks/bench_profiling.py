@@ -0,0 +1,88 @@
+"""
+Цена Server-Timing и выборочного профилирования для страницы новости.
+
+Страница запрашивается тестовым клиентом без Server-Timing, с ним
+и затем при разных долях PROFILE_SAMPLE_RATE; для каждого варианта
+печатаются медиана и p95 задержки и прирост медианы относительно
+первого. Каждый ответ должен быть 200. Запуск из каталога ya_news:
+
+    python -m benchmarks.bench_profiling --rates 0,0.01,0.1,1
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_views import UNTIL
+from benchmarks.common import measure, percentile, setup_django
+
+
+def get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rates', default='0,0.01,0.1,1')
+    parser.add_argument('--repeat', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'bench.sqlite3')
+        from django.conf import settings
+        from django.core.management import call_command
+        from django.test import Client
+        from django.test.utils import setup_test_environment
+        from django.urls import reverse
+
+        from news.models import News
+        from yanews import profiling
+
+        setup_test_environment()
+        call_command('migrate', verbosity=0)
+        call_command(
+            'seed', users=100, news=1000, comments=10000, until=UNTIL,
+            stdout=sys.stderr,
+        )
+        settings.PROFILE_DIR = Path(directory) / 'profiles'
+        detail = reverse('news:detail', args=(News.objects.first().pk,))
+        variants = [('без Server-Timing', False, 0.0)] + [
+            (f'доля {rate:5.2f}', True, rate)
+            for rate in map(float, args.rates.split(','))
+        ]
+        clients = []
+        for name, server_timing, rate in variants:
+            settings.SERVER_TIMING = server_timing
+            settings.PROFILE_SAMPLE_RATE = rate
+            # Цепочка middleware собирается на первом запросе клиента.
+            client = Client()
+            for _ in range(100):
+                get(client, detail)
+            clients.append(client)
+        # Варианты чередуются, чтобы дрейф машины делился между всеми.
+        timings = [[] for _ in variants]
+        for _ in range(args.rounds):
+            for (_, server_timing, rate), client, sample in zip(
+                variants, clients, timings
+            ):
+                settings.SERVER_TIMING = server_timing
+                settings.PROFILE_SAMPLE_RATE = rate
+                sample += measure(
+                    lambda: get(client, detail), args.repeat // args.rounds
+                )
+        profiling.store.routes.clear()
+        baseline = statistics.median(timings[0]) * 1e3
+        for (name, _, _), sample in zip(variants, timings):
+            p50 = statistics.median(sample) * 1e3
+            print(
+                f'{name:>17}: p50 {p50:7.3f} мс, '
+                f'p95 {percentile(sample, 95) * 1e3:7.3f} мс, '
+                f'{(p50 / baseline - 1) * 100:+6.1f}%'
+            )
+
+
+if __name__ == '__main__':
+    main()
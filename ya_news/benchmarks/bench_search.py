@@ -0,0 +1,127 @@
+"""
+Задержка поиска и цена поддержки поискового индекса при записи.
+
+Запуск из каталога ya_news:
+
+    python -m benchmarks.bench_search --news 100000 --comments 1000000
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import measure, setup_django, summary
+
+BATCH_SIZE = 20_000
+WORDS = (
+    'новость редиска погода выборы футбол урожай дорога город школа '
+    'студент практикум робот ключи фонарь сон приложение рекурсия '
+    'коробка победитель конкурс рассказ разработчик'
+).split()
+QUERIES = ('погода', 'новостей студентов', 'редкоеслово')
+WRITES = 500
+
+
+def text(rng, words):
+    return ' '.join(rng.choices(WORDS, k=words))
+
+
+def seed(connection, news_total, comments_total, rng):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO auth_user (id, password, is_superuser, username, "
+            "first_name, last_name, email, is_staff, is_active, "
+            "date_joined) VALUES (1, '!', 0, 'bench', '', '', '', 0, 1, "
+            "'2020-01-01 00:00:00')"
+        )
+        for first in range(1, news_total + 1, BATCH_SIZE):
+            cursor.executemany(
+                'INSERT INTO news_news (id, title, text, date, '
+                "comment_count, version) VALUES (%s, %s, %s, '2020-01-01', "
+                '0, 1)',
+                [
+                    (pk, text(rng, 4), text(rng, 60))
+                    for pk in range(
+                        first, min(first + BATCH_SIZE, news_total + 1)
+                    )
+                ],
+            )
+        for first in range(1, comments_total + 1, BATCH_SIZE):
+            cursor.executemany(
+                'INSERT INTO news_comment (id, news_id, author_id, text, '
+                'created, modified, is_hidden) VALUES (%s, %s, 1, %s, '
+                "'2020-01-01 00:00:00', '2020-01-01 00:00:00', 0)",
+                [
+                    (pk, rng.randint(1, news_total), text(rng, 15))
+                    for pk in range(
+                        first, min(first + BATCH_SIZE, comments_total + 1)
+                    )
+                ],
+            )
+
+
+def database_size(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        return pages * cursor.fetchone()[0]
+
+
+def write_cost(connection, rng):
+    """Время и прирост базы на WRITES комментариев."""
+    from news.models import Comment
+
+    size = database_size(connection)
+    start = time.perf_counter()
+    for _ in range(WRITES):
+        Comment.objects.create(news_id=1, author_id=1, text=text(rng, 15))
+    elapsed = time.perf_counter() - start
+    return elapsed / WRITES, (database_size(connection) - size) / WRITES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--news', type=int, default=100_000)
+    parser.add_argument('--comments', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'bench.sqlite3')
+        from django.core.management import call_command
+        from django.db import connection, transaction
+        from django.db.models.signals import post_save
+
+        from news import search, signals
+        from news.models import Comment
+
+        call_command('migrate', verbosity=0)
+        with transaction.atomic():
+            seed(connection, args.news, args.comments, rng)
+        size = database_size(connection)
+        start = time.perf_counter()
+        with transaction.atomic():
+            search.rebuild()
+        print(f'rebuild: {time.perf_counter() - start:.1f} s, index adds '
+              f'{(database_size(connection) - size) / 2 ** 20:.0f} MiB')
+
+        for query in QUERIES:
+            results = search.SearchResults(query)
+            print(f'{query!r:>22}: {results.count():>8} hits, first page '
+                  f'{summary(measure(lambda: results[0:10], args.repeat))}')
+
+        with_index = write_cost(connection, rng)
+        post_save.disconnect(signals.index_comment, sender=Comment)
+        without_index = write_cost(connection, rng)
+        for label, (seconds, growth) in (('with index', with_index),
+                                         ('without index', without_index)):
+            print(f'{label:>14}: {seconds * 1e3:.3f} ms and '
+                  f'{growth:.0f} bytes per comment')
+
+
+if __name__ == '__main__':
+    main()
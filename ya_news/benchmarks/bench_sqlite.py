@@ -0,0 +1,129 @@
+"""
+Пропускная способность SQLite при одновременных чтении и записи.
+
+Для каждого профиля из SQLITE_PROFILES создаётся отдельная временная
+база: режим WAL сохраняется в самом файле. Потоки-читатели открывают
+новость и первую страницу комментариев, потоки-писатели добавляют
+комментарий и обновляют счётчик, как NewsComment. Без профиля
+писатели не повторяют транзакции, чтобы было видно, сколько записей
+теряется на «database is locked». Запуск из каталога ya_news:
+
+    python -m benchmarks.bench_sqlite --readers 8 --writers 4
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from io import StringIO
+from pathlib import Path
+
+from benchmarks.common import setup_django
+
+
+def reader(news_ids, deadline, results):
+    from django.conf import settings
+    from django.db import connection
+
+    from news.models import Comment, News
+
+    rng = random.Random()
+    done = 0
+    while time.perf_counter() < deadline:
+        pk = rng.choice(news_ids)
+        News.objects.get(pk=pk)
+        list(
+            Comment.objects.filter(news_id=pk)
+            .order_by('created', 'id')[:settings.COMMENTS_PER_PAGE]
+        )
+        done += 1
+    connection.close()
+    results.append(Counter(reads=done))
+
+
+def writer(news_ids, author_id, deadline, results):
+    from django.db import OperationalError, connection
+
+    from news.models import Comment, News
+    from yanews.sqlite import atomic_with_retry
+
+    @atomic_with_retry
+    def post_comment(pk):
+        Comment.objects.create(news_id=pk, author_id=author_id, text='Текст')
+        News.objects.filter(pk=pk).touch(comment_delta=1)
+
+    rng = random.Random()
+    done = failed = 0
+    while time.perf_counter() < deadline:
+        try:
+            post_comment(rng.choice(news_ids))
+            done += 1
+        except OperationalError:
+            failed += 1
+    connection.close()
+    results.append(Counter(writes=done, failed=failed))
+
+
+def run_profile(profile, directory, args):
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection
+
+    from news.models import News
+
+    connection.close()
+    settings.DATABASES['default']['NAME'] = Path(directory) / f'{profile}.db'
+    settings.SQLITE_PROFILE = profile
+    settings.SQLITE_WRITE_RETRIES = 0 if profile == 'default' else args.retries
+    call_command('migrate', verbosity=0)
+    call_command(
+        'seed', users=100, news=args.news, comments=args.news * 10,
+        stdout=StringIO(),
+    )
+    news_ids = list(News.objects.values_list('pk', flat=True))
+    author_id = News.objects.values_list('comment__author', flat=True)[0]
+    connection.close()
+
+    results = []
+    deadline = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(target=reader, args=(news_ids, deadline, results))
+        for _ in range(args.readers)
+    ] + [
+        threading.Thread(
+            target=writer, args=(news_ids, author_id, deadline, results)
+        )
+        for _ in range(args.writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counts = sum(results, Counter())
+    print(
+        f'{profile:>12}: {counts["reads"] / args.seconds:8.0f} чтений/с, '
+        f'{counts["writes"] / args.seconds:7.0f} записей/с, '
+        f'ошибок записи {counts["failed"]}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--retries', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'bench.sqlite3')
+        from django.conf import settings
+
+        for profile in settings.SQLITE_PROFILES:
+            run_profile(profile, directory, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Задержка, SQL-запросы и память страниц YaNews на разных объёмах данных.
+
+Для каждого размера данные создаются командой seed во временном файле
+SQLite, а страницы запрашиваются тестовым клиентом через все
+middleware. Результаты пишутся в JSON и сравниваются с базовой линией
+benchmarks/baseline.json; при регрессии код выхода 1. Запуск из
+каталога ya_news:
+
+    python -m benchmarks.bench_views --sizes small,medium
+    python -m benchmarks.bench_views --update-baseline
+"""
+import argparse
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from benchmarks.common import (calibrate, compare, profile_view,
+                               read_json, setup_django, write_json)
+
+BASELINE = Path(__file__).with_name('baseline.json')
+# Параметры команды seed для каждого размера.
+SIZES = {
+    'small': dict(users=100, news=1_000, comments=10_000),
+    'medium': dict(users=1_000, news=10_000, comments=100_000),
+    'large': dict(users=10_000, news=100_000, comments=1_000_000),
+}
+# Дата фиксирована, чтобы данные совпадали от запуска к запуску.
+UNTIL = date(2024, 1, 1)
+PASSWORD = 'password'
+# Вход и регистрация упираются в хеширование пароля, повторов меньше.
+SLOW_REPEAT = 5
+
+
+def scenarios(client, anonymous):
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    from news.models import News
+
+    reader = get_user_model().objects.order_by('pk').first()
+    client.force_login(reader)
+    # Самая свежая новость собирает больше всего комментариев.
+    hot = News.objects.first()
+    detail = reverse('news:detail', args=(hot.pk,))
+    login = reverse('users:login')
+    credentials = {'username': reader.username, 'password': PASSWORD}
+    return {
+        'news:home': (lambda: anonymous.get(reverse('news:home')), None),
+        'news:detail': (lambda: anonymous.get(detail), None),
+        'news:detail last page': (
+            lambda: client.get(detail, {'page': 'last'}), None
+        ),
+        'news:detail post comment': (
+            lambda: client.post(detail, {'text': 'Комментарий'}), None
+        ),
+        'news:search': (
+            lambda: anonymous.get(reverse('news:search'), {'q': 'город'}),
+            None,
+        ),
+        'users:login': (lambda: anonymous.get(login), None),
+        'users:login post': (
+            lambda: anonymous.post(login, credentials), SLOW_REPEAT
+        ),
+        'users:signup': (
+            lambda: anonymous.get(reverse('users:signup')), None
+        ),
+    }
+
+
+def run_size(size, repeat):
+    from django.core.management import call_command
+    from django.db import connections
+    from django.test import Client
+
+    call_command('flush', interactive=False, verbosity=0)
+    call_command(
+        'seed', until=UNTIL, password=PASSWORD, stdout=sys.stderr,
+        **SIZES[size],
+    )
+    connections['default'].cursor().execute('ANALYZE')
+    results = {}
+    for name, (request, scenario_repeat) in scenarios(
+        Client(), Client()
+    ).items():
+        results[name] = profile_view(request, scenario_repeat or repeat)
+        print(
+            f'{size:>8} {name:>26}: p50 {results[name]["p50_ms"]:9.3f} ms, '
+            f'p95 {results[name]["p95_ms"]:9.3f} ms, '
+            f'{results[name]["queries"]:3} SQL, '
+            f'{results[name]["peak_kib"]:9.1f} KiB'
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--sizes', default='small,medium',
+        help=f'Через запятую из: {", ".join(SIZES)}.',
+    )
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', help='Куда записать результаты.')
+    parser.add_argument('--baseline', default=str(BASELINE))
+    parser.add_argument(
+        '--update-baseline', action='store_true',
+        help='Записать результаты как новую базовую линию.',
+    )
+    parser.add_argument(
+        '--latency-tolerance', type=float, default=0.75,
+        help='Допустимый относительный рост медианы задержки.',
+    )
+    parser.add_argument(
+        '--tail-tolerance', type=float, default=2.0,
+        help='Допустимый относительный рост p95.',
+    )
+    parser.add_argument(
+        '--memory-tolerance', type=float, default=0.5,
+        help='Допустимый относительный рост пика памяти.',
+    )
+    parser.add_argument(
+        '--query-tolerance', type=int, default=0,
+        help='Допустимое число лишних SQL-запросов.',
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'bench.sqlite3')
+        from django.core.management import call_command
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()
+        call_command('migrate', verbosity=0)
+        results = {
+            'calibration_ms': calibrate(),
+            'sizes': {
+                size: run_size(size, args.repeat)
+                for size in args.sizes.split(',')
+            },
+        }
+
+    if args.output:
+        write_json(args.output, results)
+    if args.update_baseline:
+        write_json(args.baseline, results)
+        return
+    if not Path(args.baseline).exists():
+        print('Базовой линии нет, сравнивать не с чем.')
+        return
+    regressions = compare(
+        results, read_json(args.baseline),
+        latency=args.latency_tolerance,
+        tail=args.tail_tolerance,
+        memory=args.memory_tolerance,
+        queries=args.query_tolerance,
+    )
+    for regression in regressions:
+        print(f'РЕГРЕССИЯ {regression}')
+    if regressions:
+        sys.exit(1)
+    print('Регрессий нет.')
+
+
+if __name__ == '__main__':
+    main()
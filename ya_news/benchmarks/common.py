@@ -0,0 +1,145 @@
+"""Общие помощники для бенчмарков YaNews."""
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+
+# Разница в задержке меньше этой считается шумом.
+NOISE_MS = 2
+
+
+def setup_django(database=None):
+    """
+    Настраивает Django для запуска вне manage.py.
+
+    Если передан путь database, проект работает с отдельным файлом
+    SQLite, и рабочая база не затрагивается; метрики тогда пишутся
+    рядом с ним.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    from django.conf import settings
+    if database is not None:
+        settings.DATABASES['default']['NAME'] = database
+        settings.METRICS_DIR = Path(database).parent / 'metrics'
+    django.setup()
+
+
+def measure(func, repeat):
+    """Время каждого из repeat вызовов func в секундах."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    index = max(0, round(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summary(timings):
+    """Медиана и p95 в миллисекундах."""
+    return (
+        f'median {statistics.median(timings) * 1e3:8.3f} ms, '
+        f'p95 {percentile(timings, 95) * 1e3:8.3f} ms'
+    )
+
+
+def profile_view(request, repeat, warmup=3):
+    """
+    Задержка, число SQL-запросов и пик памяти одного запроса к странице.
+
+    request — вызов тестового клиента, возвращающий ответ. Первые
+    warmup вызовов прогревают кеши и не учитываются; память меряется
+    отдельным вызовом, потому что tracemalloc сам замедляет код.
+    """
+    for _ in range(warmup):
+        response = request()
+    timings = measure(request, repeat)
+    tracemalloc.start()
+    try:
+        response = request()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'status': response.status_code,
+        'p50_ms': round(statistics.median(timings) * 1e3, 3),
+        'p95_ms': round(percentile(timings, 95) * 1e3, 3),
+        'queries': int(response['X-DB-Query-Count']),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def calibrate(repeat=20):
+    """
+    Время эталонной работы на этой машине в миллисекундах.
+
+    Базовая линия снимается на одной машине, а сравнивается на другой;
+    задержки из базовой линии масштабируются отношением калибровок.
+    """
+    data = list(range(100_000, 0, -1))
+    return round(min(measure(lambda: sorted(data), repeat)) * 1e3, 3)
+
+
+def compare(results, baseline, latency=0.75, tail=2.0, memory=0.5,
+            queries=0):
+    """
+    Регрессии results относительно baseline.
+
+    latency, tail и memory — допустимый относительный рост медианы,
+    p95 и пика памяти (0.75 — на 75%), queries — допустимое число
+    лишних SQL-запросов. У p95 допуск шире: хвост распределения
+    сильнее зависит от сборщика мусора и соседей по машине. Другой
+    код ответа — всегда регрессия: страница с ошибкой обычно быстрее.
+    """
+    speed = results['calibration_ms'] / baseline['calibration_ms']
+    regressions = []
+    for size, scenarios in results['sizes'].items():
+        for name, current in scenarios.items():
+            expected = baseline['sizes'].get(size, {}).get(name)
+            if expected is None:
+                continue
+            if current['status'] != expected['status']:
+                regressions.append(
+                    f'{size}/{name}: status {current["status"]} '
+                    f'при базовом {expected["status"]}'
+                )
+                continue
+            for metric, tolerance, scale in (
+                ('p50_ms', latency, speed),
+                ('p95_ms', tail, speed),
+                ('peak_kib', memory, 1),
+                ('queries', queries, None),
+            ):
+                if scale is None:
+                    limit = expected[metric] + tolerance
+                else:
+                    limit = expected[metric] * scale * (1 + tolerance)
+                if metric.endswith('_ms'):
+                    limit = max(limit, expected[metric] * scale + NOISE_MS)
+                if current[metric] > limit:
+                    regressions.append(
+                        f'{size}/{name}: {metric} {current[metric]} '
+                        f'при базовом {expected[metric]}'
+                    )
+    return regressions
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)
+
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as target:
+        json.dump(data, target, ensure_ascii=False, indent=2, sort_keys=True)
+        target.write('\n')
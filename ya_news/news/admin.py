@@ -1,11 +1,71 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 
 from .models import Comment, News
 
 
+def estimated_count(model, using):
+    """Число строк таблицы из статистики ANALYZE или None."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+    except DatabaseError:
+        # Таблицы sqlite_stat1 нет, пока не выполняли ANALYZE.
+        return None
+    return int(row[0].split()[0]) if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, который не считает большие таблицы целиком.
+
+    Для списка без фильтров число строк берётся из статистики
+    ANALYZE, если оно больше ADMIN_EXACT_COUNT_LIMIT. Последние
+    страницы при этом могут оказаться пустыми или неполными.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if (
+                estimate is not None
+                and estimate > settings.ADMIN_EXACT_COUNT_LIMIT
+            ):
+                return estimate
+        return super().count
+
+
+class RecentCommentsFormSet(BaseInlineFormSet):
+    """Только последние ADMIN_INLINE_COMMENTS комментариев новости."""
+
+    def get_queryset(self):
+        if not hasattr(self, '_recent'):
+            self._recent = super().get_queryset().order_by(
+                '-created', '-id'
+            )[:settings.ADMIN_INLINE_COMMENTS]
+        return self._recent
+
+
 class CommentInline(admin.StackedInline):
     model = Comment
+    formset = RecentCommentsFormSet
     extra = 0
+    raw_id_fields = ('author',)
 
 
 @admin.register(News)
@@ -13,3 +73,54 @@ class NewsAdmin(admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
+    list_display = ('title', 'date', 'comment_count')
+    list_filter = ('date',)
+    readonly_fields = ('all_comments',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @admin.display(description='Все комментарии')
+    def all_comments(self, news):
+        if news.pk is None:
+            return '—'
+        return format_html(
+            '<a href="{}?news__id__exact={}">{} шт.</a>',
+            reverse('admin:news_comment_changelist'), news.pk,
+            news.comment_count,
+        )
+
+    def save_related(self, request, form, formsets, change):
+        """Комментарии могли измениться: сбрасываем кеш новости."""
+        super().save_related(request, form, formsets, change)
+        news = self.model.objects.filter(pk=form.instance.pk)
+        news.touch()
+        news.recount_comments()
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'news', 'author', 'created', 'is_hidden')
+    list_select_related = ('news', 'author')
+    list_filter = ('created', 'is_hidden')
+    ordering = ('-created', '-id')
+    raw_id_fields = ('news', 'author')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def save_model(self, request, obj, form, change):
+        """Правка комментария меняет страницу его новости."""
+        super().save_model(request, obj, form, change)
+        news = News.objects.filter(pk=obj.news_id)
+        news.touch()
+        news.recount_comments()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        news = News.objects.filter(pk=obj.news_id)
+        news.touch()
+        news.recount_comments()
+
+    def delete_queryset(self, request, queryset):
+        news = list(queryset.values_list('news_id', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        News.objects.filter(pk__in=news).recount_comments()
@@ -0,0 +1,169 @@
+"""
+JSON для мобильного клиента: список новостей и новость с комментариями.
+
+Строки выбираются через .values() без создания экземпляров моделей
+и сериализуются orjson. Параметр fields (и comment_fields для
+комментариев) оставляет в ответе только перечисленные поля, страницы
+выбираются по курсорам after и before, как на странице новости.
+Полная выгрузка для аналитики отдаётся потоком NDJSON.
+"""
+import orjson
+from django.conf import settings
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.core.exceptions import BadRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import generic
+from django.views.decorators.http import condition
+
+from .export import export_lines, gzip_stream
+from .models import Comment, News
+from .pagination import KeysetPaginator
+from .views import news_etag
+
+# Поле ответа и соответствующий ему путь для .values().
+NEWS_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'text': 'text',
+    'date': 'date',
+    'comment_count': 'comment_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+LIST_FIELDS = ('id', 'title', 'date', 'comment_count')
+
+
+def json_response(payload, status=200):
+    return HttpResponse(
+        orjson.dumps(payload), status=status,
+        content_type='application/json',
+    )
+
+
+def requested_fields(request, parameter, available, default):
+    """Поля из параметра запроса вида fields=id,title."""
+    value = request.GET.get(parameter)
+    if not value:
+        return default
+    fields = tuple(dict.fromkeys(value.split(',')))
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise BadRequest(
+            f'Неизвестные поля в {parameter}: {", ".join(unknown)}.'
+        )
+    return fields
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest('limit должен быть числом.')
+    return max(1, min(size, settings.API_MAX_PAGE_SIZE))
+
+
+def project(rows, fields, available):
+    """Оставляет в строках только запрошенные поля под их именами."""
+    lookups = [(field, available[field]) for field in fields]
+    return [
+        {field: row[lookup] for field, lookup in lookups} for row in rows
+    ]
+
+
+def keyset_page(paginator, request, fields, available):
+    page = paginator.page(
+        after=request.GET.get('after'), before=request.GET.get('before'),
+    )
+    return {
+        'results': project(page, fields, available),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+class ApiView(generic.View):
+    """Ошибки запроса и 404 возвращаются в JSON, а не страницей."""
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except BadRequest as error:
+            return json_response({'error': str(error)}, status=400)
+        except Http404 as error:
+            return json_response({'error': str(error)}, status=404)
+
+
+class NewsListAPI(ApiView):
+    """Новости от свежих к старым, страницами по курсору."""
+
+    def get(self, request):
+        fields = requested_fields(request, 'fields', NEWS_FIELDS, LIST_FIELDS)
+        lookups = {NEWS_FIELDS[field] for field in fields} | {'id', 'date'}
+        paginator = KeysetPaginator(
+            News.objects.values(*lookups), 'date', page_size(request),
+            descending=True,
+        )
+        return json_response(
+            keyset_page(paginator, request, fields, NEWS_FIELDS)
+        )
+
+
+class NewsDetailAPI(ApiView):
+    """Новость и страница её комментариев."""
+
+    @method_decorator(condition(etag_func=news_etag))
+    def get(self, request, pk):
+        fields = requested_fields(
+            request, 'fields', NEWS_FIELDS, tuple(NEWS_FIELDS)
+        )
+        comment_fields = requested_fields(
+            request, 'comment_fields', COMMENT_FIELDS, tuple(COMMENT_FIELDS)
+        )
+        news = News.objects.filter(pk=pk).values(
+            *{NEWS_FIELDS[field] for field in fields}
+        ).first()
+        if news is None:
+            raise Http404('Новость не найдена.')
+        lookups = {COMMENT_FIELDS[field] for field in comment_fields}
+        paginator = KeysetPaginator(
+            Comment.objects.filter(news_id=pk, is_hidden=False).values(
+                *lookups | {'id', 'created'}
+            ),
+            'created',
+            settings.COMMENTS_PER_PAGE,
+        )
+        return json_response({
+            'news': project([news], fields, NEWS_FIELDS)[0],
+            'comments': keyset_page(
+                paginator, request, comment_fields, COMMENT_FIELDS
+            ),
+        })
+
+
+class NewsExport(UserPassesTestMixin, generic.View):
+    """Все новости с комментариями в NDJSON; с ?gzip — сжатые."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        lines = export_lines(settings.EXPORT_CHUNK_SIZE)
+        if 'gzip' in request.GET:
+            response = StreamingHttpResponse(
+                gzip_stream(lines), content_type='application/gzip'
+            )
+            filename = 'news.ndjson.gz'
+        else:
+            response = StreamingHttpResponse(
+                lines, content_type='application/x-ndjson'
+            )
+            filename = 'news.ndjson'
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}"'
+        )
+        return response
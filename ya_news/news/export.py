@@ -0,0 +1,64 @@
+"""
+Выгрузка всех новостей с комментариями в NDJSON.
+
+Одна строка — одна новость со списком её комментариев. Новости
+читаются пачками по id, комментарии — одним запросом на пачку,
+поэтому в памяти одновременно только одна пачка, сколько бы новостей
+ни было в базе. Выгрузку можно сжимать gzip на лету.
+"""
+import zlib
+
+import orjson
+
+from .models import Comment, News
+
+NEWS_FIELDS = ('id', 'title', 'text', 'date', 'comment_count')
+COMMENT_FIELDS = (
+    'id', 'news_id', 'text', 'created', 'author__username', 'is_hidden',
+)
+
+
+def news_chunks(chunk_size):
+    """Пачки новостей по возрастанию id."""
+    last = 0
+    while True:
+        chunk = list(
+            News.objects.filter(pk__gt=last).order_by('pk')
+            .values(*NEWS_FIELDS)[:chunk_size]
+            .iterator(chunk_size=chunk_size)
+        )
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]['id']
+
+
+def export_lines(chunk_size):
+    """Строки NDJSON в байтах, по одной на новость."""
+    for chunk in news_chunks(chunk_size):
+        comments = {news['id']: [] for news in chunk}
+        for comment in (
+            Comment.objects.filter(news_id__in=comments)
+            .order_by('created', 'id').values(*COMMENT_FIELDS)
+            .iterator(chunk_size=chunk_size)
+        ):
+            comments[comment.pop('news_id')].append({
+                'id': comment['id'],
+                'text': comment['text'],
+                'created': comment['created'],
+                'author': comment['author__username'],
+                'is_hidden': comment['is_hidden'],
+            })
+        for news in chunk:
+            news['comments'] = comments[news['id']]
+            yield orjson.dumps(news, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def gzip_stream(chunks):
+    """Сжимает поток байтов в формат gzip по мере чтения."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.export import export_lines, gzip_stream
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает все новости с комментариями в NDJSON, '
+        'читая базу пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки; по умолчанию стандартный вывод.',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжать выгрузку gzip.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.EXPORT_CHUNK_SIZE,
+            help='Сколько новостей читать за один запрос.',
+        )
+
+    def handle(self, *args, **options):
+        chunks = export_lines(options['chunk_size'])
+        if options['gzip']:
+            chunks = gzip_stream(chunks)
+        if options['output'] == '-':
+            self.write_stdout(chunks)
+        else:
+            with open(options['output'], 'wb') as output:
+                self.write(output, chunks)
+
+    def write_stdout(self, chunks):
+        """
+        Выгрузка в stdout команды.
+
+        У стандартного вывода байты пишутся в его buffer. Поток из
+        call_command(stdout=...) должен быть двоичным: без окончания
+        строки OutputWrapper передаёт байты как есть.
+        """
+        buffer = getattr(self.stdout, 'buffer', None)
+        if buffer is not None:
+            self.write(buffer, chunks)
+            return
+        for chunk in chunks:
+            self.stdout.write(chunk, ending='')
+        self.stdout.flush()
+
+    def write(self, output, chunks):
+        for chunk in chunks:
+            output.write(chunk)
+        output.flush()
@@ -0,0 +1,56 @@
+import pstats
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from yanews.profiling import route_file
+
+
+class Command(BaseCommand):
+    help = (
+        'Склеивает профили маршрута из PROFILE_DIR, собранные всеми '
+        'процессами: печатает самые дорогие функции и по желанию '
+        'сохраняет общий .prof и свёрнутые стеки для flame graph. '
+        'Без маршрута выводит список профилированных маршрутов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('route', nargs='?', help='Имя URL, news:detail.')
+        parser.add_argument('--dir', default=settings.PROFILE_DIR)
+        parser.add_argument('--sort', default='cumulative')
+        parser.add_argument('--limit', type=int, default=30)
+        parser.add_argument('--prof', help='Куда сохранить общий профиль.')
+        parser.add_argument(
+            '--collapsed', help='Куда сохранить свёрнутые стеки.',
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options['dir'])
+        if not options['route']:
+            routes = Counter(
+                path.name.rsplit('.', 2)[0]
+                for path in directory.glob('*.prof')
+            )
+            for route, processes in sorted(routes.items()):
+                self.stdout.write(f'{route}: процессов {processes}')
+            return
+        name = route_file(options['route'])
+        files = sorted(directory.glob(f'{name}.*.prof'))
+        if not files:
+            raise CommandError(
+                f'Профилей {options["route"]} в {directory} нет.'
+            )
+        stats = pstats.Stats(*map(str, files), stream=self.stdout)
+        stats.sort_stats(options['sort']).print_stats(options['limit'])
+        if options['prof']:
+            stats.dump_stats(options['prof'])
+        if options['collapsed']:
+            stacks = Counter()
+            for path in directory.glob(f'{name}.*.collapsed'):
+                for line in path.read_text().splitlines():
+                    stack, count = line.rsplit(' ', 1)
+                    stacks[stack] += int(count)
+            Path(options['collapsed']).write_text(''.join(
+                f'{stack} {count}\n' for stack, count in stacks.most_common()
+            ))
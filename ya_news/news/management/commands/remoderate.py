@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from news import remoderation
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново проверяет комментарии на запрещённые слова из BAD_WORDS: '
+        'скрывает нарушающие и возвращает те, что больше не нарушают. '
+        'Проверяются только комментарии, изменённые после прошлого '
+        'прохода, или все, если словарь изменился.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов, проверяющих тексты.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint', default=settings.MODERATION_CHECKPOINT,
+            help='Файл, в котором хранится прогресс.',
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Проверить все комментарии, не глядя на прошлые проходы.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['checkpoint']
+        state = remoderation.start_run(
+            remoderation.read_checkpoint(path), full=options['full']
+        )
+        remoderation.write_checkpoint(path, state)
+        chunks = remoderation.chunks(
+            remoderation.pending_comments(state),
+            state['run']['cursor'], options['chunk_size'],
+        )
+        self.verbosity = options['verbosity']
+        self.scanned = self.hidden = self.shown = 0
+        self.started = time.perf_counter()
+        workers = options['workers']
+        if workers > 1:
+            # Исполнители не работают с базой, но соединение
+            # основного процесса не должно достаться им при fork.
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(workers) as pool:
+                self.run_parallel(pool, workers, chunks, state, path)
+        else:
+            for rows, cursor in chunks:
+                self.save(rows, remoderation.check(rows), cursor, state,
+                          path)
+        remoderation.write_checkpoint(path, remoderation.finish_run(state))
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(
+            f'Проверено {self.scanned} комментариев за {elapsed:.1f} с '
+            f'({self.scanned / max(elapsed, 1e-9):.0f} в секунду), '
+            f'скрыто {self.hidden}, возвращено {self.shown}.'
+        )
+
+    def run_parallel(self, pool, workers, chunks, state, path):
+        # Пачки записываются по порядку, чтобы курсор в файле прогресса
+        # всегда отделял записанное от незаписанного; в работе не больше
+        # двух пачек на процесс, так что память не растёт с таблицей.
+        pending = deque()
+        for rows, cursor in chunks:
+            pending.append(
+                (rows, pool.apply_async(remoderation.check, (rows,)), cursor)
+            )
+            if len(pending) >= 2 * workers:
+                rows, result, cursor = pending.popleft()
+                self.save(rows, result.get(), cursor, state, path)
+        while pending:
+            rows, result, cursor = pending.popleft()
+            self.save(rows, result.get(), cursor, state, path)
+
+    def save(self, rows, decision, cursor, state, path):
+        hidden, shown = remoderation.apply(*decision, state['run']['started'])
+        state['run']['cursor'] = cursor
+        remoderation.write_checkpoint(path, state)
+        self.scanned += len(rows)
+        self.hidden += hidden
+        self.shown += shown
+        if self.verbosity > 1:
+            elapsed = time.perf_counter() - self.started
+            self.stdout.write(
+                f'{self.scanned} проверено, '
+                f'{self.scanned / max(elapsed, 1e-9):.0f} в секунду'
+            )
@@ -0,0 +1,85 @@
+import multiprocessing
+import time
+from datetime import date
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from news import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, новостями '
+        'и комментариями для замеров. Результат определяется зерном '
+        'и не зависит от числа процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--news', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты новостей.',
+        )
+        parser.add_argument(
+            '--until', type=date.fromisoformat, default=date.today(),
+            help='Дата самой свежей новости, ГГГГ-ММ-ДД.',
+        )
+        parser.add_argument(
+            '--password', default='password',
+            help='Пароль всех созданных пользователей.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Число процессов, которые делят между собой пачки.',
+        )
+
+    def handle(self, *args, **options):
+        if options['comments'] and not (options['news'] and options['users']):
+            raise CommandError(
+                'Для комментариев нужны новости и пользователи.'
+            )
+        plan = seeding.SeedPlan(
+            options['seed'], options['users'], options['news'],
+            options['comments'], options['batch_size'], options['days'],
+            options['password'], options['until'],
+        )
+        workers = options['workers']
+        pool = None
+        if workers > 1:
+            # Дочерние процессы открывают собственные соединения.
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            pool = context.Pool(
+                workers, seeding.init_worker, (context.Lock(),)
+            )
+        try:
+            for kind in (seeding.USERS, seeding.NEWS, seeding.COMMENTS):
+                self.seed(plan, kind, pool)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        fixed = seeding.finish(plan)
+        self.stdout.write(f'Счётчиков комментариев обновлено: {fixed}')
+
+    def seed(self, plan, kind, pool):
+        task = partial(seeding.seed_batch, plan, kind)
+        batches = plan.batches(kind)
+        results = (
+            pool.imap_unordered(task, batches) if pool
+            else map(task, batches)
+        )
+        created = 0
+        started = time.perf_counter()
+        for count in results:
+            created += count
+            rate = created / (time.perf_counter() - started)
+            self.stdout.write(
+                f'{kind}: {created}/{plan.counts[kind]}, {rate:.0f} в секунду'
+            )
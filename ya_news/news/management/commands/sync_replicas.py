@@ -0,0 +1,51 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплики из NEWS_REPLICAS '
+        'через backup API: читатели реплик видят либо старую, '
+        'либо новую копию целиком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять каждые N секунд, пока команду не остановят.',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.NEWS_REPLICAS:
+            raise CommandError('В NEWS_REPLICAS не указано ни одной реплики.')
+        while True:
+            for alias in settings.NEWS_REPLICAS:
+                started = time.perf_counter()
+                self.copy(
+                    settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'],
+                    settings.DATABASES[alias]['NAME'],
+                )
+                self.stdout.write(
+                    f'{alias}: скопировано за '
+                    f'{time.perf_counter() - started:.2f} с'
+                )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, source_path, target_path):
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path, timeout=30)
+        try:
+            # Копия снимается за один шаг: если основную базу изменят
+            # между шагами, backup начнёт сначала и при постоянной
+            # записи может не закончиться. В режиме WAL чтение
+            # источника запись не блокирует.
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,56 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from yanews import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает процесс: импортирует представления, заполняет '
+        'таблицы URL и компилирует шаблоны. Печатает время этапов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Измерить холодный старт в новом процессе, '
+                 'вместе с импортом Django и django.setup().',
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести результат в JSON, чтобы сравнивать релизы.',
+        )
+
+    def handle(self, *args, **options):
+        if options['cold']:
+            output = subprocess.run(
+                [sys.executable, '-m', 'yanews.warmup'],
+                check=True, capture_output=True, text=True,
+                cwd=settings.BASE_DIR,
+            ).stdout
+            report = [
+                (phase['phase'], phase['ms'] / 1e3, phase['count'])
+                for phase in json.loads(output)
+            ]
+        else:
+            report = warmup.warm_up()
+        if options['json']:
+            self.stdout.write(warmup.as_json(report))
+            return
+        for name, seconds, count in report:
+            self.stdout.write(
+                f'{name:>14}: {seconds * 1e3:8.1f} мс, объектов {count}'
+            )
+        self.stdout.write(
+            f'{"всего":>14}: '
+            f'{sum(seconds for _, seconds, _ in report) * 1e3:8.1f} мс'
+        )
+        if not warmup.templates_cached():
+            self.stdout.write(self.style.WARNING(
+                'Кеширующий загрузчик шаблонов выключен (DEBUG = True): '
+                'скомпилированные шаблоны не сохранятся.'
+            ))
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-17 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='version',
+            field=models.IntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.15 on 2026-10-17 07:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_date_index'),
+    ]
+
+    operations = [
+        # Индекс заполняется командой rebuild_news_index и сигналами.
+        migrations.RunSQL(
+            "CREATE VIRTUAL TABLE news_search USING fts5("
+            "news_id UNINDEXED, title, body, tokenize='unicode61')",
+            "DROP TABLE news_search",
+        ),
+    ]
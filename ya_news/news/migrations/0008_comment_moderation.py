@@ -0,0 +1,35 @@
+# Generated by Django 3.2.15 on 2026-10-17 07:38
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created(apps, schema_editor):
+    """Старые комментарии считаем изменёнными в момент создания."""
+    Comment = apps.get_model('news', 'Comment')
+    Comment.objects.update(modified=F('created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_comment_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='is_hidden',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['modified', 'id'], name='comment_modified_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.15 on 2026-10-17 07:41
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_rollup(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    NewsDayRollup = apps.get_model('news', 'NewsDayRollup')
+    NewsDayRollup.objects.bulk_create(
+        NewsDayRollup(
+            day=row['date'], news_count=row['news_count'],
+            comment_count=row['total_comments'],
+        )
+        for row in News.objects.order_by().values('date').annotate(
+            news_count=Count('pk'), total_comments=Sum('comment_count'),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_comment_moderation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsDayRollup',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('news_count', models.IntegerField(default=0)),
+                ('comment_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('-day',),
+            },
+        ),
+        migrations.RunPython(fill_rollup, migrations.RunPython.noop),
+    ]
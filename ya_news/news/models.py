@@ -1,22 +1,94 @@
 from datetime import datetime
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def actual_comment_count():
+    """Выражение с фактическим числом видимых комментариев к новости."""
+    return Coalesce(
+        Subquery(
+            Comment.objects.filter(news=OuterRef('pk'), is_hidden=False)
+            .order_by()
+            .values('news')
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+class NewsQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        """Любая правка новостей повышает их версию."""
+        kwargs.setdefault('version', F('version') + 1)
+        return super().update(**kwargs)
+
+    def touch(self, comment_delta=0):
+        """
+        Отмечает изменение новости или её комментариев.
+
+        Версия новости растёт, и закешированные фрагменты со старой
+        версией больше не используются; счётчик комментариев атомарно
+        сдвигается на comment_delta.
+        """
+        updated = self.update(
+            version=F('version') + 1,
+            comment_count=F('comment_count') + comment_delta,
+        )
+        if comment_delta:
+            NewsDayRollup.objects.filter(day__in=self.values('date')).update(
+                comment_count=F('comment_count') + comment_delta * Subquery(
+                    self.filter(date=OuterRef('day'))
+                    .order_by()
+                    .values('date')
+                    .annotate(total=Count('pk'))
+                    .values('total')
+                ),
+            )
+        return updated
+
+    def recount_comments(self):
+        """Исправляет разошедшиеся счётчики комментариев."""
+        stale = self.exclude(comment_count=actual_comment_count())
+        days = set(stale.values_list('date', flat=True))
+        fixed = stale.update(
+            comment_count=actual_comment_count(),
+            version=F('version') + 1,
+        )
+        NewsDayRollup.objects.refresh(days)
+        return fixed
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.IntegerField(default=0, editable=False)
+    version = models.IntegerField(default=1, editable=False)
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-date',)
+        ordering = ('-date', '-id')
+        indexes = (
+            models.Index(fields=('date', 'id'), name='news_date_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, update_fields=None, **kwargs):
+        # Версию повышает signals.remember_date, она пишется всегда.
+        if update_fields is not None:
+            update_fields = {*update_fields, 'version'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -29,9 +101,90 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    modified = models.DateTimeField(auto_now=True)
+    # Скрытые модерацией комментарии не показываются и не считаются.
+    is_hidden = models.BooleanField(default=False)
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='news_comment_thread_idx',
+            ),
+            models.Index(fields=('created', 'id'), name='comment_created_idx'),
+            models.Index(
+                fields=('modified', 'id'), name='comment_modified_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+
+def day_totals(news):
+    """Число новостей и комментариев к ним по дням."""
+    return news.order_by().values('date').annotate(
+        news_count=Count('pk'), total_comments=Sum('comment_count'),
+    )
+
+
+class NewsDayRollupQuerySet(models.QuerySet):
+
+    @transaction.atomic
+    def refresh(self, days):
+        """
+        Пересчитывает строки за дни days по новостям этих дней.
+
+        Удаление и вставка идут одной транзакцией: читатели не видят
+        пропавших дней, а параллельный пересчёт ждёт, пока этот
+        не закончит, и не вставляет те же дни второй раз.
+        """
+        field = News._meta.get_field('date')
+        days = {field.to_python(day) for day in days}
+        if not days:
+            return
+        self.filter(day__in=days).delete()
+        self.bulk_create(
+            NewsDayRollup(
+                day=row['date'], news_count=row['news_count'],
+                comment_count=row['total_comments'],
+            )
+            for row in day_totals(News.objects.filter(date__in=days))
+        )
+
+    @transaction.atomic
+    def rebuild(self, batch_size=1000):
+        """Заново строит все строки; для новостей, созданных в обход ORM."""
+        self.all().delete()
+        self.bulk_create(
+            (
+                NewsDayRollup(
+                    day=row['date'], news_count=row['news_count'],
+                    comment_count=row['total_comments'],
+                )
+                for row in day_totals(News.objects.all()).iterator()
+            ),
+            batch_size=batch_size,
+        )
+
+
+class NewsDayRollup(models.Model):
+    """
+    Итоги по дням для архива.
+
+    Обновляются при каждом изменении новостей и их счётчиков
+    комментариев, поэтому архив не группирует таблицы новостей
+    и комментариев: за год здесь не больше 366 строк.
+    """
+    day = models.DateField(primary_key=True)
+    news_count = models.IntegerField(default=0)
+    comment_count = models.IntegerField(default=0)
+
+    objects = NewsDayRollupQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-day',)
+
+    def __str__(self):
+        return f'{self.day}: {self.news_count}'
@@ -0,0 +1,89 @@
+"""Проверка текста на запрещённые слова за один проход."""
+import re
+
+# Латинские буквы, которые пишутся так же, как кириллические.
+HOMOGLYPHS = str.maketrans({
+    'a': 'а',
+    'b': 'в',
+    'c': 'с',
+    'e': 'е',
+    'h': 'н',
+    'k': 'к',
+    'm': 'м',
+    'o': 'о',
+    'p': 'р',
+    't': 'т',
+    'x': 'х',
+    'y': 'у',
+    'ё': 'е',
+})
+REPEATED_LETTERS = re.compile(r'(\w)\1+')
+
+
+def normalize(text):
+    """
+    Приводит текст к виду, в котором ищутся запрещённые слова.
+
+    Текст переводится в нижний регистр, «ё» заменяется на «е»,
+    латинские двойники — на кириллические буквы, а повторы одной
+    буквы подряд схлопываются: «РЕЕЕДИСКА» превращается в «редиска».
+    """
+    return REPEATED_LETTERS.sub(r'\1', text.lower().translate(HOMOGLYPHS))
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик для поиска любого слова из словаря.
+
+    Автомат строится один раз при создании или при вызове `load()`,
+    после чего текст проверяется за один проход независимо от
+    размера словаря.
+    """
+
+    def __init__(self, words=()):
+        self.load(words)
+
+    def load(self, words):
+        """Перестраивает автомат под новый словарь."""
+        goto = [{}]
+        output = [None]
+        for word in words:
+            word = normalize(word)
+            if not word:
+                continue
+            state = 0
+            for char in word:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append(None)
+                state = next_state
+            output[state] = word
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                if output[next_state] is None:
+                    output[next_state] = output[fail[next_state]]
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+
+    def search(self, text):
+        """Возвращает первое найденное в тексте слово или None."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in normalize(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
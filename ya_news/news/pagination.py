@@ -0,0 +1,118 @@
+"""Постраничный вывод по ключу (keyset) вместо OFFSET."""
+import base64
+import binascii
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+class KeysetPage:
+    """Страница объектов и курсоры для соседних страниц."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Делит queryset на страницы по паре (key, id).
+
+    Каждая страница выбирается условием на ключ последнего показанного
+    объекта, поэтому при подходящем индексе это просмотр диапазона
+    индекса, а не OFFSET. Объекты могут быть как экземплярами моделей,
+    так и словарями из `.values()`.
+    """
+
+    def __init__(self, queryset, key, per_page, descending=False):
+        self.queryset = queryset
+        self.key = key
+        self.field = queryset.model._meta.get_field(key)
+        self.per_page = per_page
+        self.descending = descending
+
+    def _value(self, obj, name):
+        if isinstance(obj, dict):
+            return obj[name]
+        return getattr(obj, name)
+
+    def encode(self, obj):
+        """Курсор, указывающий на объект."""
+        value = self._value(obj, self.key).isoformat()
+        raw = f'{value}|{self._value(obj, "id")}'
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        """Значения ключа и id из курсора; для мусора — 404."""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode()).decode()
+            value, pk = raw.rsplit('|', 1)
+            value = self.field.to_python(value)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError,
+                ValidationError):
+            raise Http404('Некорректный курсор.')
+        if value is None:
+            raise Http404('Некорректный курсор.')
+        return value, pk
+
+    def _order(self, forward):
+        prefix = '-' if forward == self.descending else ''
+        return f'{prefix}{self.key}', f'{prefix}id'
+
+    def _beyond(self, cursor, forward):
+        value, pk = self.decode(cursor)
+        lookup = 'gt' if forward != self.descending else 'lt'
+        return (
+            Q(**{f'{self.key}__{lookup}': value})
+            | Q(**{self.key: value, f'id__{lookup}': pk})
+        )
+
+    def page(self, after=None, before=None, last=False):
+        """
+        Страница после курсора after, перед курсором before
+        или последняя страница, если передан last.
+        """
+        forward = not (before or last)
+        queryset = self.queryset.order_by(*self._order(forward))
+        if after or before:
+            queryset = queryset.filter(
+                self._beyond(after or before, forward)
+            )
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if not forward:
+            object_list.reverse()
+        if not object_list:
+            return KeysetPage(object_list)
+        if forward:
+            has_next, has_previous = has_more, bool(after)
+        else:
+            has_next, has_previous = bool(before), has_more
+        return KeysetPage(
+            object_list,
+            next_cursor=(
+                self.encode(object_list[-1]) if has_next else None
+            ),
+            previous_cursor=(
+                self.encode(object_list[0]) if has_previous else None
+            ),
+        )
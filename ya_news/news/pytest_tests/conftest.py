@@ -3,10 +3,53 @@ from datetime import timedelta
 from django.utils import timezone
 import pytest
 from django.conf import settings
+from django.core.cache import caches
 from django.test.client import Client
 from django.utils import timezone
 
 from news.models import Comment, News
+from yanews.middleware import query_budget
+
+
+@pytest.fixture(autouse=True, scope='session')
+def metrics_dir(tmp_path_factory):
+    """Метрики тестовых запросов не должны попадать в каталог проекта."""
+    settings.METRICS_DIR = tmp_path_factory.mktemp('metrics')
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Фрагменты из кеша не должны переходить из теста в тест."""
+    yield
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture
+def assert_query_budget():
+    """
+    Проверка, что ответ уложился в бюджет SQL-запросов.
+
+    Бюджет берётся из QUERY_BUDGETS по имени URL и методу запроса
+    (см. query_budget), число запросов — из заголовка, который ставит
+    QueryBudgetMiddleware. Повторять один и тот же запрос страница
+    не должна вовсе.
+    """
+    def check(response):
+        url_name = response.resolver_match.view_name
+        method = response.request['REQUEST_METHOD']
+        budget = query_budget(url_name, method)
+        if budget is None:
+            return
+        count = int(response['X-DB-Query-Count'])
+        assert count <= budget, (
+            f'{url_name}: {count} SQL-запросов при бюджете {budget}'
+        )
+        duplicates = int(response['X-DB-Duplicate-Queries'])
+        assert not duplicates, (
+            f'{url_name}: {duplicates} повторных SQL-запросов'
+        )
+    return check
 
 
 @pytest.fixture
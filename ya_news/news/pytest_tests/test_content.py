@@ -1,15 +1,30 @@
+import gzip
+import json
+import pstats
+from datetime import date
 from http import HTTPStatus
+from io import BytesIO, StringIO
 
 import pytest
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.http import HttpResponse
 from django.urls import reverse
 
+from news.admin import EstimatedCountPaginator
+from news.models import Comment, News, NewsDayRollup, NewsDayRollupQuerySet
+from yanews import metrics, profiling, warmup
+from yanews.middleware import ServerTimingViewMiddleware
+
 
 @pytest.mark.django_db
-def test_news_count_on_homepage(client, news_list):
+def test_news_count_on_homepage(client, news_list, assert_query_budget):
     """На главной странице не больше NEWS_COUNT_ON_HOME_PAGE новостей."""
     response = client.get(reverse('news:home'))
     assert response.status_code == HTTPStatus.OK.value
+    assert_query_budget(response)
     assert response.context['object_list'].count(
     ) == settings.NEWS_COUNT_ON_HOME_PAGE
 
@@ -33,6 +48,40 @@ def test_comment_order_on_detail_page(client, news, comments):
     assert created_times == sorted(created_times)
 
 
+@pytest.mark.django_db
+def test_comments_are_paginated_by_cursor(client, news, comments, settings):
+    """Комментарии выводятся страницами, курсоры ведут к соседним."""
+    settings.COMMENTS_PER_PAGE = 2
+    news_detail = reverse('news:detail', args=[news.pk])
+    seen = []
+    page = client.get(news_detail).context['comment_page']
+    assert not page.has_previous
+    while True:
+        assert len(page) <= settings.COMMENTS_PER_PAGE
+        seen.extend(page)
+        if not page.has_next:
+            break
+        page = client.get(
+            news_detail, {'after': page.next_cursor}
+        ).context['comment_page']
+    assert [comment.pk for comment in seen] == [
+        comment.pk for comment in news.comment_set.order_by('created', 'id')
+    ]
+
+    previous = client.get(
+        news_detail, {'before': page.previous_cursor}
+    ).context['comment_page']
+    assert list(previous) == seen[-len(page) - 2:-len(page)]
+
+
+@pytest.mark.django_db
+def test_invalid_comment_cursor(client, news):
+    """Испорченный курсор приводит к 404."""
+    news_detail = reverse('news:detail', args=[news.pk])
+    response = client.get(news_detail, {'after': 'garbage'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 @pytest.mark.django_db
 def test_anonymous_user_sees_no_comment_form(client, news):
     """Анонимный пользователь не видит форму для комментариев."""
@@ -47,3 +96,406 @@ def test_authenticated_user_sees_comment_form(author_client, news):
     news_detail = reverse('news:detail', args=[news.pk])
     response = author_client.get(news_detail)
     assert 'form' in response.context
+
+
+@pytest.mark.django_db
+def test_unchanged_news_detail_is_not_modified(client, news):
+    """Повторный запрос с тем же ETag получает 304."""
+    news_detail = reverse('news:detail', args=[news.pk])
+    etag = client.get(news_detail)['ETag']
+    response = client.get(news_detail, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_news_detail_etag_changes(author_client, client, news):
+    """Значение ETag зависит от комментариев и пользователя."""
+    news_detail = reverse('news:detail', args=[news.pk])
+    etag = client.get(news_detail)['ETag']
+    assert author_client.get(news_detail)['ETag'] != etag
+    author_client.post(news_detail, data={'text': 'Comment text'})
+    response = client.get(news_detail, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('edit', ('save', 'update_fields', 'update'))
+def test_news_edited_through_orm_is_modified(client, news, edit):
+    """Правка новости в обход представлений меняет страницу и ETag."""
+    news_detail = reverse('news:detail', args=[news.pk])
+    etag = client.get(news_detail)['ETag']
+    if edit == 'update':
+        News.objects.filter(pk=news.pk).update(title='Новый заголовок')
+    else:
+        news.title = 'Новый заголовок'
+        news.save(**({'update_fields': ['title']} if edit != 'save' else {}))
+    response = client.get(news_detail, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert 'Новый заголовок' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_search_finds_word_forms(client, author):
+    """Поиск находит другие формы слова и подсвечивает их."""
+    news = News.objects.create(
+        title='Новости садоводства', text='Вырастили огромную редиску.'
+    )
+    comment = Comment.objects.create(
+        news=news, author=author, text='Люблю редиски и огурцы'
+    )
+    News.objects.create(title='Прочее', text='Про погоду.')
+    response = client.get(reverse('news:search'), {'q': 'редиска'})
+    hits = response.context['object_list']
+    assert {(hit['news'], hit['comment']) for hit in hits} == {
+        (news, None), (news, comment),
+    }
+    assert '<mark>редиску</mark>' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_search_index_follows_changes(client, author, news):
+    """Индекс обновляется при правке и удалении."""
+    search_url = reverse('news:search')
+    news.text = 'Совсем другой текст'
+    news.save()
+    assert len(client.get(search_url, {'q': 'другой'}).context[
+        'object_list'
+    ]) == 1
+    news.delete()
+    assert len(client.get(search_url, {'q': 'другой'}).context[
+        'object_list'
+    ]) == 0
+
+
+@pytest.mark.django_db
+def test_search_results_are_paginated(client, settings):
+    """Результаты поиска выводятся страницами."""
+    settings.SEARCH_RESULTS_PER_PAGE = 2
+    for index in range(5):
+        News.objects.create(title=f'Погода {index}', text='Прогноз погоды')
+    response = client.get(reverse('news:search'), {'q': 'погода'})
+    assert response.context['paginator'].count == 5
+    assert len(response.context['object_list']) == 2
+
+
+@pytest.mark.django_db
+def test_api_news_list_pages_by_cursor(client, news_list, assert_query_budget):
+    """Список новостей в JSON идёт от свежих к старым по курсорам."""
+    url = reverse('news:api_list')
+    response = client.get(url, {'limit': 5})
+    assert response['Content-Type'] == 'application/json'
+    assert_query_budget(response)
+    seen = []
+    data = response.json()
+    while True:
+        assert set(data['results'][0]) == {
+            'id', 'title', 'date', 'comment_count'
+        }
+        seen.extend(item['id'] for item in data['results'])
+        if data['next'] is None:
+            break
+        data = client.get(url, {'limit': 5, 'after': data['next']}).json()
+    assert seen == list(
+        News.objects.order_by('-date', '-id').values_list('id', flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_api_sparse_fieldsets(client, news, comment, assert_query_budget):
+    """В ответе только запрошенные поля, неизвестные поля — ошибка 400."""
+    response = client.get(
+        reverse('news:api_detail', args=[news.pk]),
+        {'fields': 'title', 'comment_fields': 'text,author'},
+    )
+    assert_query_budget(response)
+    assert response.json() == {
+        'news': {'title': news.title},
+        'comments': {
+            'results': [
+                {'text': comment.text, 'author': comment.author.username}
+            ],
+            'next': None,
+            'previous': None,
+        },
+    }
+    response = client.get(reverse('news:api_list'), {'fields': 'password'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert 'password' in response.json()['error']
+
+
+@pytest.mark.django_db
+def test_api_errors_are_json(client, news):
+    """Нет новости или испорчен курсор — 404 в JSON."""
+    for url, params in (
+        (reverse('news:api_detail', args=[news.pk + 1]), {}),
+        (reverse('news:api_list'), {'after': 'garbage'}),
+    ):
+        response = client.get(url, params)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        assert 'error' in response.json()
+
+
+@pytest.mark.django_db
+def test_export_streams_every_news(
+        client, author_client, author, news_list, comment):
+    """Выгрузка отдаёт все новости с комментариями, только персоналу."""
+    url = reverse('news:export')
+    assert author_client.get(url).status_code == HTTPStatus.FORBIDDEN
+    author.is_staff = True
+    author.save()
+    response = author_client.get(url)
+    lines = b''.join(response.streaming_content).splitlines()
+    packed = b''.join(author_client.get(url, {'gzip': 1}).streaming_content)
+    assert gzip.decompress(packed).splitlines() == lines
+    exported = [json.loads(line) for line in lines]
+    assert [item['id'] for item in exported] == sorted(
+        News.objects.values_list('id', flat=True)
+    )
+    commented = next(item for item in exported if item['comments'])
+    assert commented['id'] == comment.news_id
+    assert commented['comments'][0]['author'] == author.username
+
+
+@pytest.mark.django_db
+def test_export_command_reads_in_chunks(tmp_path, news_list, comment):
+    """Команда export_news пишет ту же выгрузку при любом размере пачки."""
+    outputs = []
+    for chunk_size in (1, 1000):
+        output = tmp_path / f'{chunk_size}.ndjson.gz'
+        call_command(
+            'export_news', output=output, gzip=True, chunk_size=chunk_size
+        )
+        outputs.append(gzip.decompress(output.read_bytes()))
+    assert outputs[0] == outputs[1]
+    assert len(outputs[0].splitlines()) == News.objects.count()
+
+
+@pytest.mark.django_db
+def test_export_command_writes_to_its_stdout(news_list, comment):
+    """Без --output выгрузка пишется в stdout, переданный команде."""
+    output = BytesIO()
+    call_command('export_news', gzip=True, stdout=output)
+    lines = gzip.decompress(output.getvalue()).splitlines()
+    assert len(lines) == News.objects.count()
+
+
+@pytest.mark.django_db
+def test_admin_news_shows_recent_comments(admin_client, news, comments,
+                                          settings):
+    """В админке новости только последние комментарии и ссылка на все."""
+    settings.ADMIN_INLINE_COMMENTS = 2
+    response = admin_client.get(
+        reverse('admin:news_news_change', args=[news.pk])
+    )
+    formset = response.context['inline_admin_formsets'][0].formset
+    assert [form.instance.pk for form in formset] == [
+        comment.pk for comment in
+        news.comment_set.order_by('-created', '-id')[:2]
+    ]
+    changelist = admin_client.get(
+        reverse('admin:news_comment_changelist'),
+        {'news__id__exact': news.pk},
+    )
+    assert changelist.context['cl'].result_count == len(comments)
+
+
+@pytest.mark.django_db
+def test_admin_paginator_uses_table_statistics(settings, news_list):
+    """Для большой таблицы без фильтров число строк берётся из ANALYZE."""
+    connection.cursor().execute('ANALYZE')
+    settings.ADMIN_EXACT_COUNT_LIMIT = 0
+    assert EstimatedCountPaginator(News.objects.all(), 5).count == (
+        News.objects.count()
+    )
+    News.objects.all()[0].delete()
+    assert EstimatedCountPaginator(News.objects.all(), 5).count == (
+        News.objects.count() + 1
+    )
+    filtered = News.objects.filter(title__startswith='News')
+    assert EstimatedCountPaginator(filtered, 5).count == filtered.count()
+
+
+@pytest.mark.django_db
+def test_archive_rollup_follows_changes(author_client, author):
+    """Итоги архива обновляются при правке новостей и комментариев."""
+    def rollup():
+        return {
+            row.day: (row.news_count, row.comment_count)
+            for row in NewsDayRollup.objects.all()
+        }
+
+    first = News.objects.create(title='Первая', text='Текст',
+                                date=date(2024, 1, 10))
+    second = News.objects.create(title='Вторая', text='Текст',
+                                 date=date(2024, 1, 10))
+    author_client.post(
+        reverse('news:detail', args=[first.pk]), {'text': 'Комментарий'}
+    )
+    assert rollup() == {date(2024, 1, 10): (2, 1)}
+    first.refresh_from_db()
+    first.date = date(2023, 12, 31)
+    first.save()
+    assert rollup() == {date(2024, 1, 10): (1, 0), date(2023, 12, 31): (1, 1)}
+    second.delete()
+    assert rollup() == {date(2023, 12, 31): (1, 1)}
+
+
+@pytest.mark.django_db
+def test_archive_rollup_refresh_is_atomic(monkeypatch, news):
+    """Сбой пересчёта не оставляет архив без строк за день."""
+    def fail(*args, **kwargs):
+        raise DatabaseError('сбой вставки')
+
+    monkeypatch.setattr(NewsDayRollupQuerySet, 'bulk_create', fail)
+    for refresh in (
+        lambda: NewsDayRollup.objects.refresh([news.date]),
+        NewsDayRollup.objects.rebuild,
+    ):
+        with pytest.raises(DatabaseError):
+            refresh()
+        assert NewsDayRollup.objects.filter(day=news.date).exists()
+
+
+@pytest.mark.django_db
+def test_archive_pages(client, news_list, assert_query_budget, settings):
+    """Архив показывает периоды с итогами и новости периода по курсору."""
+    settings.ARCHIVE_NEWS_PER_PAGE = 3
+    NewsDayRollup.objects.rebuild()
+    newest = News.objects.first().date
+    response = client.get(reverse('news:archive'))
+    assert_query_budget(response)
+    assert sum(
+        period['news_count'] for period in response.context['periods']
+    ) == News.objects.count()
+
+    url = reverse('news:archive_month', args=[newest.year, newest.month])
+    response = client.get(url)
+    assert_query_budget(response)
+    expected = list(News.objects.filter(
+        date__year=newest.year, date__month=newest.month
+    ).values_list('pk', flat=True))
+    seen = []
+    page = response.context['news_page']
+    while True:
+        seen.extend(news.pk for news in page)
+        if not page.has_next:
+            break
+        page = client.get(
+            url, {'after': page.next_cursor}
+        ).context['news_page']
+    assert seen == expected
+    assert client.get(
+        reverse('news:archive_month', args=[newest.year, 13])
+    ).status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_sampling_profiler_writes_reports(client, settings, tmp_path):
+    """Профили копятся по маршрутам и склеиваются profile_report."""
+    settings.PROFILE_SAMPLE_RATE = 1
+    settings.PROFILE_FLUSH_EVERY = 1
+    settings.PROFILE_DIR = tmp_path
+    profiling.store.routes.clear()
+    client.get(reverse('news:home'))
+    client.get(reverse('news:home'))
+    assert profiling.store.routes['news:home'].samples == 2
+
+    output = StringIO()
+    call_command(
+        'profile_report', 'news:home', prof=tmp_path / 'merged.prof',
+        collapsed=tmp_path / 'home.collapsed', stdout=output,
+    )
+    assert 'function calls' in output.getvalue()
+    assert pstats.Stats(str(tmp_path / 'merged.prof')).total_calls
+    assert (tmp_path / 'home.collapsed').exists()
+    profiling.store.routes.clear()
+
+
+def test_sampling_profiler_off_by_default():
+    """С нулевой долей middleware не подключается."""
+    with pytest.raises(MiddlewareNotUsed):
+        profiling.SamplingProfilerMiddleware(lambda request: None)
+
+
+@pytest.mark.django_db
+def test_server_timing_splits_response_time(client, news, comments):
+    """Server-Timing раскладывает время ответа по этапам без остатка."""
+    response = client.get(reverse('news:detail', args=[news.pk]))
+    durations = {}
+    for metric in response['Server-Timing'].split(', '):
+        name, duration, *desc = metric.split(';')
+        durations[name] = float(duration[len('dur='):])
+        if name == 'db':
+            assert desc == [f'desc="{response["X-DB-Query-Count"]} SQL"']
+    assert list(durations) == ['url', 'view', 'db', 'tpl', 'mw', 'total']
+    assert durations['tpl'] > 0
+    parts = sum(durations.values()) - durations['total']
+    assert parts == pytest.approx(durations['total'], abs=0.05)
+
+
+def test_server_timing_marks_need_outer_middleware(rf, settings):
+    """Без ServerTimingMiddleware внутренние отметки не ломают запрос."""
+    settings.SERVER_TIMING = True
+    request = rf.get('/')
+    middleware = ServerTimingViewMiddleware(lambda request: HttpResponse())
+    middleware.process_view(request, None, (), {})
+    middleware.process_template_response(request, HttpResponse())
+    assert middleware(request).status_code == HTTPStatus.OK
+
+
+def scrape(client, **extra):
+    """Значения метрик с /metrics/ по имени с метками."""
+    response = client.get(reverse('metrics'), **extra)
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    return dict(
+        line.rsplit(' ', 1)
+        for line in response.content.decode().splitlines()
+        if not line.startswith('#')
+    )
+
+
+@pytest.mark.django_db
+def test_metrics_are_summed_over_processes(
+        settings, tmp_path, author_client, news):
+    """Метрики всех процессов складываются в один ответ /metrics/."""
+    settings.METRICS_DIR = tmp_path
+    url = reverse('news:detail', args=[news.pk])
+    author_client.get(url)
+    author_client.post(url, data={'text': 'Comment text'})
+    before = scrape(author_client)
+    requests = (
+        'http_requests_total'
+        '{route="news:detail",method="GET",status="200"}'
+    )
+    duration = 'http_request_duration_seconds_{}{{route="news:detail",{}}}'
+    assert before[duration.format('bucket', 'status="200",le="+Inf"')] == (
+        before[duration.format('count', 'status="200"')]
+    )
+    assert 'comment_writes_total{action="created"}' in before
+    assert 'cache_requests_total{cache="fragments",result="miss"}' in before
+    assert 'cache_requests_total{cache="objects",result="miss"}' in before
+    assert 'db_queries_per_request_count{route="news:detail"}' in before
+
+    own = metrics.registry.path()
+    own.with_name('1000000000-other.json').write_text(own.read_text())
+    after = scrape(author_client)
+    assert int(after[requests]) == 2 * int(before[requests])
+
+    # Процесс, получивший тот же pid, не затирает файл прежнего.
+    metrics.registry.reset()
+    author_client.get(url)
+    after = scrape(author_client)
+    assert int(after[requests]) == 2 * int(before[requests]) + 1
+
+
+def test_metrics_are_not_public(client):
+    """Чужим адресам /metrics/ не отдаётся."""
+    response = client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_warm_up_compiles_every_template():
+    """Прогрев компилирует все шаблоны проекта."""
+    report = {name: count for name, _, count in warmup.warm_up()}
+    templates = list((settings.BASE_DIR / 'templates').rglob('*.html'))
+    assert report['templates'] == len(templates)
@@ -1,9 +1,21 @@
+from datetime import date
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError
 from django.urls import reverse
+from django.utils import timezone
+from yanews import routers
+from yanews.sqlite import atomic_with_retry
 
-from news.models import Comment
+from news.forms import WARNING
+from news.models import Comment, News, actual_comment_count
+from news import remoderation
+from news.moderation import WordMatcher
+from news.search import SearchResults
 
 FORM_DATA_TEMPLATE = {'text': 'Comment text'}
 
@@ -17,7 +29,8 @@ def test_anonymous_cannot_post_comment(client, news):
 
 
 @pytest.mark.django_db
-def test_authenticated_can_post_comment(author_client, news):
+def test_authenticated_can_post_comment(
+        author_client, news, assert_query_budget):
     """
     Проверяет, что авторизованный пользователь
     может отправить комментарий.
@@ -28,6 +41,7 @@ def test_authenticated_can_post_comment(author_client, news):
 
     assert response.status_code == HTTPStatus.FOUND
     assert Comment.objects.filter(news=news, text=form_data['text']).exists()
+    assert_query_budget(response)
 
 
 @pytest.mark.django_db
@@ -47,7 +61,37 @@ def test_prohibited_words_in_comment(author_client, news):
 
 
 @pytest.mark.django_db
-def test_user_can_edit_own_comment(author_client, comment):
+@pytest.mark.parametrize(
+    'text',
+    (
+        'РЕДИСКА',
+        'Ты рeдиcкa!',
+        'Какой неееегодяяяй',
+    ),
+)
+def test_disguised_prohibited_words_in_comment(author_client, news, text):
+    """
+    Проверяет, что запрещённые слова находятся и в изменённом виде:
+    в другом регистре, с латинскими буквами и повторами букв.
+    """
+    news_detail_url = reverse('news:detail', args=[news.pk])
+    response = author_client.post(news_detail_url, data={'text': text})
+
+    assert response.status_code == HTTPStatus.OK.value
+    assert not Comment.objects.filter(text=text).exists()
+    assert WARNING in response.context['form'].errors['text']
+
+
+def test_matcher_treats_yo_as_ye():
+    """Проверяет, что «ё» и «е» в словаре и тексте не различаются."""
+    matcher = WordMatcher(('ёжик',))
+    assert matcher.search('Тут ежик') == 'ежик'
+    assert matcher.search('Тут ужик') is None
+
+
+@pytest.mark.django_db
+def test_user_can_edit_own_comment(
+        author_client, comment, assert_query_budget):
     """Проверяет, что пользователь может редактировать свои комментарии."""
     comment_edit_url = reverse('news:edit', kwargs={'pk': comment.pk})
     form_data = FORM_DATA_TEMPLATE.copy()
@@ -55,10 +99,24 @@ def test_user_can_edit_own_comment(author_client, comment):
     response = author_client.post(comment_edit_url, data=form_data)
 
     assert response.status_code == HTTPStatus.FOUND
+    assert_query_budget(response)
     comment.refresh_from_db()
     assert comment.text == form_data['text']
 
 
+@pytest.mark.django_db
+def test_edited_comment_is_not_served_from_cache(author_client, comment):
+    """Проверяет, что после правки не показывается старый фрагмент."""
+    news_detail_url = reverse('news:detail', args=[comment.news.pk])
+    assert comment.text in author_client.get(news_detail_url).content.decode()
+    author_client.post(
+        reverse('news:edit', kwargs={'pk': comment.pk}),
+        data={'text': 'Updated comment text'},
+    )
+    content = author_client.get(news_detail_url).content.decode()
+    assert 'Updated comment text' in content
+
+
 @pytest.mark.django_db
 def test_user_cannot_edit_others_comment(not_author_client, comment):
     """Проверяет, что пользователь не может редактировать чужие комментарии."""
@@ -72,12 +130,14 @@ def test_user_cannot_edit_others_comment(not_author_client, comment):
 
 
 @pytest.mark.django_db
-def test_user_can_delete_own_comment(author_client, comment):
+def test_user_can_delete_own_comment(
+        author_client, comment, assert_query_budget):
     """Проверяет, что пользователь может удалять свои комментарии."""
     comment_delete_url = reverse('news:delete', kwargs={'pk': comment.pk})
     response = author_client.post(comment_delete_url)
 
     assert response.status_code == HTTPStatus.FOUND
+    assert_query_budget(response)
     assert not Comment.objects.filter(pk=comment.pk).exists()
 
 
@@ -89,3 +149,202 @@ def test_user_cant_delete_comment(not_author_client, comment):
 
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Comment.objects.filter(pk=comment.id).exists()
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(author_client, news):
+    """Проверяет, что счётчик комментариев меняется вместе с ними."""
+    news_detail_url = reverse('news:detail', args=[news.pk])
+    author_client.post(news_detail_url, data=FORM_DATA_TEMPLATE.copy())
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+    comment = Comment.objects.get(news=news)
+    author_client.post(reverse('news:delete', kwargs={'pk': comment.pk}))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+@pytest.mark.django_db
+def test_recount_comments_fixes_drift(news, comments):
+    """Проверяет, что команда recount_comments чинит счётчики."""
+    News.objects.filter(pk=news.pk).update(comment_count=100)
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == len(comments)
+
+
+@pytest.mark.django_db
+def test_seed_creates_consistent_data():
+    """Проверяет, что seed создаёт данные с верными счётчиками."""
+    call_command(
+        'seed', users=3, news=5, comments=40, batch_size=7,
+        stdout=StringIO(),
+    )
+    assert News.objects.count() == 5
+    assert Comment.objects.count() == 40
+    assert not News.objects.exclude(
+        comment_count=actual_comment_count()
+    ).exists()
+    assert SearchResults(News.objects.first().title).count()
+
+
+@pytest.mark.django_db
+def test_seed_is_deterministic():
+    """Проверяет, что одно зерно даёт те же данные и при повторе."""
+    options = dict(
+        users=3, news=5, comments=20, until=date(2024, 1, 1),
+        stdout=StringIO(),
+    )
+    call_command('seed', **options)
+    first = list(Comment.objects.values_list('text', 'created'))
+    News.objects.all().delete()
+    call_command('seed', **options)
+    assert list(Comment.objects.values_list('text', 'created')) == first
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_retried_when_database_locked(settings):
+    """Проверяет, что запись повторяется, пока база занята."""
+    settings.SQLITE_RETRY_DELAY = 0
+    attempts = []
+
+    @atomic_with_retry
+    def write():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OperationalError('database is locked')
+        return 'ok'
+
+    assert write() == 'ok'
+    assert len(attempts) == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_edit_retry_counts_shown_comment(
+        monkeypatch, settings, author_client, news, comment):
+    """Повтор правки скрытого комментария всё же учитывает его в счётчике."""
+    settings.SQLITE_RETRY_DELAY = 0
+    Comment.objects.filter(pk=comment.pk).update(is_hidden=True)
+    News.objects.recount_comments()
+    save = Comment.save
+    attempts = []
+
+    def locked_once(self, *args, **kwargs):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OperationalError('database is locked')
+        return save(self, *args, **kwargs)
+
+    monkeypatch.setattr(Comment, 'save', locked_once)
+    response = author_client.post(
+        reverse('news:edit', kwargs={'pk': comment.pk}),
+        data=FORM_DATA_TEMPLATE.copy(),
+    )
+    assert response.status_code == HTTPStatus.FOUND
+    assert len(attempts) == 2
+    assert not Comment.objects.get(pk=comment.pk).is_hidden
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_router_reads_news_from_replica_until_write(settings):
+    """Проверяет, что после записи новости читаются из основной базы."""
+    settings.NEWS_REPLICAS = ['replica']
+    router = routers.PrimaryReplicaRouter()
+    routers.state.replicas, routers.state.wrote = True, False
+    try:
+        assert router.db_for_read(News) == 'replica'
+        assert router.db_for_read(get_user_model()) == 'default'
+        assert router.db_for_write(Comment) == 'default'
+        assert router.db_for_read(News) == 'default'
+    finally:
+        routers.state.replicas = routers.state.wrote = False
+
+
+@pytest.mark.django_db
+def test_comment_pins_author_to_primary(settings, author_client, news):
+    """Проверяет, что после комментария автор читает из основной базы."""
+    settings.NEWS_REPLICAS = ['default']
+    url = reverse('news:detail', args=[news.pk])
+    response = author_client.get(url)
+    assert settings.PRIMARY_PIN_COOKIE not in response.cookies
+    response = author_client.post(url, data=FORM_DATA_TEMPLATE.copy())
+    cookie = response.cookies[settings.PRIMARY_PIN_COOKIE]
+    assert cookie['max-age'] == settings.PRIMARY_PIN_SECONDS
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('workers', (1, 2))
+def test_remoderate_follows_word_list(
+        monkeypatch, tmp_path, news, comments, workers):
+    """Комментарии перепроверяются по новому словарю, счётчики верны."""
+    options = dict(
+        checkpoint=tmp_path / 'moderation.json', workers=workers,
+        chunk_size=2, stdout=StringIO(),
+    )
+    call_command('remoderate', **options)
+    assert not Comment.objects.filter(is_hidden=True).exists()
+
+    words = ('comment 1', 'comment 3')
+    monkeypatch.setattr(remoderation, 'BAD_WORDS', words)
+    monkeypatch.setattr(
+        remoderation, 'bad_words_matcher', WordMatcher(words)
+    )
+    call_command('remoderate', **options)
+    assert set(
+        Comment.objects.filter(is_hidden=True).values_list('text', flat=True)
+    ) == {'Comment 1', 'Comment 3'}
+    news.refresh_from_db()
+    assert news.comment_count == len(comments) - 2
+
+
+@pytest.mark.django_db
+def test_remoderate_bumps_version_when_count_is_unchanged(news, comments):
+    """Скрытие одного и возврат другого комментария меняют версию."""
+    hidden, shown = Comment.objects.order_by('pk')[:2]
+    Comment.objects.filter(pk=shown.pk).update(is_hidden=True)
+    News.objects.filter(pk=news.pk).recount_comments()
+    news.refresh_from_db()
+    count, version = news.comment_count, news.version
+    remoderation.apply(
+        [(hidden.pk, news.pk, hidden.text)],
+        [(shown.pk, news.pk, shown.text)],
+        timezone.now().isoformat(),
+    )
+    news.refresh_from_db()
+    assert news.comment_count == count
+    assert news.version > version
+
+
+@pytest.mark.django_db
+def test_remoderate_resumes_and_scans_only_changes(
+        monkeypatch, tmp_path, news, comments, author):
+    """Прерванный проход продолжается, следующий берёт только новое."""
+    options = dict(
+        checkpoint=tmp_path / 'moderation.json', workers=1, chunk_size=2,
+    )
+    apply = remoderation.apply
+    calls = []
+
+    def crash_on_second_chunk(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        return apply(*args)
+
+    monkeypatch.setattr(remoderation, 'apply', crash_on_second_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        call_command('remoderate', stdout=StringIO(), **options)
+    monkeypatch.setattr(remoderation, 'apply', apply)
+    output = StringIO()
+    call_command('remoderate', stdout=output, **options)
+    assert f'Проверено {len(comments) - 2} ' in output.getvalue()
+
+    Comment.objects.create(news=news, author=author, text='Негодяй!')
+    assert SearchResults('негодяй').count() == 1
+    output = StringIO()
+    call_command('remoderate', stdout=output, **options)
+    assert 'Проверено 1 ' in output.getvalue()
+    assert Comment.objects.get(is_hidden=True).text == 'Негодяй!'
+    assert SearchResults('негодяй').count() == 0
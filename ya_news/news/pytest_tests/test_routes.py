@@ -27,7 +27,7 @@ NOT_AUTHOR_CLIENT = lazy_fixture('not_author_client')
     ),
 )
 def test_pages_availability_for_users(
-        url_name, user, expected_status, news, comment):
+        url_name, user, expected_status, news, comment, assert_query_budget):
     """Проверяет доступность страниц для разных пользователей."""
     if url_name in ('news:detail', 'news:edit', 'news:delete'):
         if url_name == 'news:detail':
@@ -38,6 +38,7 @@ def test_pages_availability_for_users(
         url = reverse(url_name)
     response = user.get(url)
     assert response.status_code == expected_status
+    assert_query_budget(response)
 
 
 @pytest.mark.parametrize(
@@ -0,0 +1,151 @@
+"""
+Повторная проверка опубликованных комментариев на запрещённые слова.
+
+CommentForm проверяет только новый текст, поэтому после пополнения
+BAD_WORDS старые комментарии остаются как были. Здесь комментарии
+читаются пачками по ключу (modified, id), процессы-исполнители
+прогоняют их через тот же автомат, что и форма, а основной процесс
+одним UPDATE на пачку скрывает найденные и возвращает те, что больше
+не нарушают правил. Вместе с флагом обновляются счётчики новостей
+и поисковый индекс.
+
+Прогресс хранится в JSON-файле: прерванный проход продолжается
+с последней обработанной пачки, следующий проверяет только
+комментарии, созданные или изменённые после начала предыдущего.
+Если словарь изменился, проверяется вся таблица.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from yanews.sqlite import atomic_with_retry
+
+from . import search
+from .forms import BAD_WORDS, bad_words_matcher
+from .models import Comment, News
+from .moderation import normalize
+from .pagination import KeysetPaginator
+
+FIELDS = ('id', 'news_id', 'text', 'is_hidden', 'modified')
+
+
+def words_fingerprint():
+    """Отпечаток словаря: меняется, только если меняется поиск."""
+    normalized = sorted({normalize(word) for word in BAD_WORDS} - {''})
+    return hashlib.sha256('\n'.join(normalized).encode()).hexdigest()
+
+
+def read_checkpoint(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def write_checkpoint(path, state):
+    """Записывает состояние целиком или не записывает вовсе."""
+    path = Path(path)
+    temporary = path.with_name(path.name + '.tmp')
+    temporary.write_text(json.dumps(state))
+    temporary.replace(path)
+
+
+def start_run(state, full=False):
+    """
+    Состояние для очередного прохода.
+
+    Незаконченный проход продолжается, если словарь не менялся.
+    """
+    words = words_fingerprint()
+    if full or state.get('words') != words:
+        state = {'words': words, 'scanned_until': None, 'run': None}
+    if state['run'] is None:
+        state['run'] = {
+            'started': timezone.now().isoformat(), 'cursor': None,
+        }
+    return state
+
+
+def finish_run(state):
+    return {**state, 'scanned_until': state['run']['started'], 'run': None}
+
+
+def pending_comments(state):
+    """Комментарии, которые этот проход должен проверить."""
+    queryset = Comment.objects.filter(
+        modified__lte=parse_datetime(state['run']['started'])
+    )
+    if state['scanned_until']:
+        queryset = queryset.filter(
+            modified__gt=parse_datetime(state['scanned_until'])
+        )
+    return queryset.values(*FIELDS)
+
+
+def chunks(queryset, cursor, chunk_size):
+    """Пачки строк и курсор после каждой из них."""
+    paginator = KeysetPaginator(queryset, 'modified', chunk_size)
+    while True:
+        page = paginator.page(after=cursor)
+        if not page.object_list:
+            return
+        cursor = paginator.encode(page.object_list[-1])
+        yield [
+            (row['id'], row['news_id'], row['text'], row['is_hidden'])
+            for row in page
+        ], cursor
+        if not page.has_next:
+            return
+
+
+def check(rows):
+    """
+    Решение по пачке: какие комментарии скрыть, какие вернуть.
+
+    Выполняется в процессах-исполнителях и не обращается к базе.
+    """
+    hide, show = [], []
+    for pk, news_id, text, is_hidden in rows:
+        offending = bad_words_matcher.search(text) is not None
+        if offending and not is_hidden:
+            hide.append((pk, news_id, text))
+        elif is_hidden and not offending:
+            show.append((pk, news_id, text))
+    return hide, show
+
+
+@atomic_with_retry
+def apply(hide, show, started):
+    """
+    Записывает решение по пачке.
+
+    Комментарии, изменённые после начала прохода, не трогаем:
+    их проверит следующий проход.
+    """
+    unchanged = Comment.objects.filter(
+        modified__lte=parse_datetime(started)
+    )
+    hidden = list(unchanged.filter(
+        pk__in=[pk for pk, _, _ in hide]
+    ).values_list('pk', flat=True))
+    shown = set(unchanged.filter(
+        pk__in=[pk for pk, _, _ in show]
+    ).values_list('pk', flat=True))
+    Comment.objects.filter(pk__in=hidden).update(is_hidden=True)
+    Comment.objects.filter(pk__in=shown).update(is_hidden=False)
+    search.delete_rows([2 * pk + search.COMMENT for pk in hidden])
+    search.write_rows([
+        search.comment_row(Comment(pk=pk, news_id=news_id, text=text))
+        for pk, news_id, text in show if pk in shown
+    ])
+    # Скрытый или возвращённый комментарий меняет страницу новости,
+    # даже если их число осталось прежним.
+    changed = set(hidden) | shown
+    news = News.objects.filter(pk__in={
+        news_id for pk, news_id, _ in hide + show if pk in changed
+    })
+    news.touch()
+    news.recount_comments()
+    return len(hidden), len(shown)
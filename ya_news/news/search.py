@@ -0,0 +1,214 @@
+"""
+Поиск по новостям и комментариям с учётом русской морфологии.
+
+Слова приводятся к основе стеммером Snowball, и в таблицу SQLite FTS5
+news_search попадают уже основы: «новостей» и «новости» находятся
+по одному запросу. Rowid записи кодирует объект: 2 * id для новости
+и 2 * id + 1 для комментария, поэтому обновление и удаление записи
+идут по первичному ключу индекса.
+"""
+import re
+import threading
+from functools import lru_cache
+
+import snowballstemmer
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from yanews.metrics import watch_lru_cache
+
+from .models import Comment, News
+
+TABLE = 'news_search'
+NEWS, COMMENT = 0, 1
+# Совпадение в заголовке весит больше, чем в тексте.
+RANK = f'bm25({TABLE}, 0.0, 10.0, 1.0)'
+WORD = re.compile(r'\w+')
+SNIPPET_WORDS = 30
+
+_local = threading.local()
+
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    """Основа слова; стеммер не потокобезопасен, у потока он свой."""
+    stemmer = getattr(_local, 'stemmer', None)
+    if stemmer is None:
+        stemmer = _local.stemmer = snowballstemmer.stemmer('russian')
+    return stemmer.stemWord(word.lower().replace('ё', 'е'))
+
+
+watch_lru_cache('stems', stem)
+
+
+def stems(text):
+    return [stem(word) for word in WORD.findall(text)]
+
+
+def news_row(news):
+    return (2 * news.pk + NEWS, news.pk, ' '.join(stems(news.title)),
+            ' '.join(stems(news.text)))
+
+
+def comment_row(comment):
+    return (2 * comment.pk + COMMENT, comment.news_id, '',
+            ' '.join(stems(comment.text)))
+
+
+def index_news(news):
+    write_rows([news_row(news)])
+
+
+def index_comment(comment):
+    if comment.is_hidden:
+        unindex_comment(comment)
+    else:
+        write_rows([comment_row(comment)])
+
+
+def unindex_news(news):
+    delete_rows([2 * news.pk + NEWS])
+
+
+def unindex_comment(comment):
+    delete_rows([2 * comment.pk + COMMENT])
+
+
+def write_rows(rows):
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {TABLE} (rowid, news_id, title, body) '
+            'VALUES (%s, %s, %s, %s)',
+            rows,
+        )
+
+
+def delete_rows(rowids):
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {TABLE} WHERE rowid = %s',
+            [(rowid,) for rowid in rowids],
+        )
+
+
+def match_expression(query):
+    """Запрос FTS5: все основы слов запроса, каждая в кавычках."""
+    query_stems = stems(query)
+    if not query_stems:
+        return None
+    return ' AND '.join(f'"{query_stem}"' for query_stem in query_stems)
+
+
+def highlight(text, query):
+    """
+    Фрагмент текста вокруг первого совпадения с подсвеченными словами.
+
+    Подсветка считается по исходному тексту, а не по индексу,
+    где хранятся только основы.
+    """
+    query_stems = set(stems(query))
+    words = list(WORD.finditer(text))
+    first = next(
+        (index for index, word in enumerate(words)
+         if stem(word.group()) in query_stems),
+        0,
+    )
+    start = max(0, first - SNIPPET_WORDS // 3)
+    window = words[start:start + SNIPPET_WORDS]
+    if not window:
+        return ''
+    parts = ['…' if start else '']
+    position = window[0].start()
+    for word in window:
+        parts.append(escape(text[position:word.start()]))
+        if stem(word.group()) in query_stems:
+            parts.append(f'<mark>{escape(word.group())}</mark>')
+        else:
+            parts.append(escape(word.group()))
+        position = word.end()
+    if window[-1] is not words[-1]:
+        parts.append('…')
+    return mark_safe(''.join(parts))
+
+
+class SearchResults:
+    """
+    Ранжированные результаты поиска для Paginator.
+
+    Число совпадений и каждая страница запрашиваются отдельно,
+    в объекты превращаются только строки текущей страницы.
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self.expression = match_expression(query)
+
+    def count(self):
+        if self.expression is None:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {TABLE} WHERE {TABLE} MATCH %s',
+                (self.expression,),
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if self.expression is None:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+                f'ORDER BY {RANK} LIMIT %s OFFSET %s',
+                (self.expression, page.stop - page.start, page.start),
+            )
+            rowids = [row[0] for row in cursor.fetchall()]
+        return self.hits(rowids)
+
+    def hits(self, rowids):
+        news = News.objects.in_bulk(
+            [rowid // 2 for rowid in rowids if rowid % 2 == NEWS]
+        )
+        comments = Comment.objects.select_related('news').in_bulk(
+            [rowid // 2 for rowid in rowids if rowid % 2 == COMMENT]
+        )
+        hits = []
+        for rowid in rowids:
+            if rowid % 2 == NEWS and rowid // 2 in news:
+                item = news[rowid // 2]
+                hits.append({
+                    'news': item,
+                    'comment': None,
+                    'snippet': highlight(item.text, self.query),
+                })
+            elif rowid % 2 == COMMENT and rowid // 2 in comments:
+                comment = comments[rowid // 2]
+                hits.append({
+                    'news': comment.news,
+                    'comment': comment,
+                    'snippet': highlight(comment.text, self.query),
+                })
+        return hits
+
+
+def rebuild(chunk_size=2000):
+    """Заново заполняет индекс по всем новостям и комментариям."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+    for queryset, row in (
+        (News.objects.only('title', 'text'), news_row),
+        (
+            Comment.objects.filter(is_hidden=False).only('news', 'text'),
+            comment_row,
+        ),
+    ):
+        rows = []
+        for obj in queryset.order_by().iterator(chunk_size=chunk_size):
+            rows.append(row(obj))
+            if len(rows) == chunk_size:
+                write_rows(rows)
+                rows = []
+        write_rows(rows)
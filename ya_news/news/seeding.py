@@ -0,0 +1,207 @@
+"""
+Синтетические данные для замеров на больших объёмах.
+
+Всё создаваемое определяется зерном: пачка номер N каждого вида
+строится своим генератором случайных чисел, поэтому результат
+не зависит от того, сколько процессов делят пачки между собой.
+Идентификаторы задаются явно, и у каждой пачки свой непересекающийся
+диапазон. Процессы параллельно строят объекты и строки поискового
+индекса, а пишут по очереди: SQLite всё равно допускает одного
+писателя, а конкурирующие транзакции получают «database is locked».
+
+Распределение неравномерное, как на живом сайте: большая часть
+комментариев приходится на несколько свежих новостей, а пишет их
+небольшая группа самых активных пользователей.
+"""
+import random
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import search
+from .models import Comment, News, NewsDayRollup
+
+User = get_user_model()
+
+USERS, NEWS, COMMENTS = 'users', 'news', 'comments'
+# Чем больше показатель, тем сильнее перекос к первым элементам:
+# при 4 на 10% самых свежих новостей приходится больше половины
+# комментариев, при 3 — на 10% пользователей почти половина.
+HOT_NEWS_POWER = 4
+HEAVY_COMMENTER_POWER = 3
+WORDS = (
+    'новость', 'город', 'жители', 'власти', 'решение', 'проект', 'улица',
+    'район', 'школа', 'дорога', 'парк', 'мост', 'выставка', 'концерт',
+    'фестиваль', 'матч', 'команда', 'сезон', 'погода', 'дождь', 'снег',
+    'мороз', 'лето', 'зима', 'весна', 'осень', 'цена', 'рынок', 'магазин',
+    'транспорт', 'автобус', 'метро', 'поезд', 'аэропорт', 'больница',
+    'врач', 'университет', 'студенты', 'учёные', 'открытие', 'музей',
+    'театр', 'премьера', 'книга', 'фильм', 'режиссёр', 'артист',
+    'новый', 'старый', 'большой', 'городской', 'местный', 'первый',
+    'важный', 'главный', 'быстрый', 'тихий', 'открыли', 'закрыли',
+    'построили', 'обсудили', 'объявили', 'перенесли', 'начали',
+    'завершили', 'сегодня', 'вчера', 'утром', 'вечером', 'снова',
+    'впервые', 'наконец', 'очень', 'почти', 'уже',
+)
+
+
+class SeedPlan:
+    """
+    Параметры генерации и начала диапазонов идентификаторов.
+
+    План передаётся в процессы-исполнители, поэтому всё, что считается
+    по базе, вычисляется один раз в основном процессе.
+    """
+
+    def __init__(self, seed, users, news, comments, batch_size, days,
+                 password, until):
+        self.seed = seed
+        self.counts = {USERS: users, NEWS: news, COMMENTS: comments}
+        self.batch_size = batch_size
+        self.days = days
+        self.password = make_password(password)
+        # Даты отсчитываются от полуночи, а не от текущего момента,
+        # чтобы повторный запуск с тем же зерном давал те же данные.
+        self.until = until
+        self.now = timezone.make_aware(datetime.combine(until, time.min))
+        self.bases = {
+            USERS: next_id(User),
+            NEWS: next_id(News),
+            COMMENTS: next_id(Comment),
+        }
+
+    def batches(self, kind):
+        return range(-(-self.counts[kind] // self.batch_size))
+
+    def ids(self, kind, batch):
+        start = batch * self.batch_size
+        stop = min(start + self.batch_size, self.counts[kind])
+        return range(self.bases[kind] + start, self.bases[kind] + stop)
+
+    def news_date(self, number):
+        """Дата новости: чем больше номер, тем новее новость."""
+        total = self.counts[NEWS]
+        age = self.days * (total - 1 - number) // max(total, 1)
+        return self.until - timedelta(days=age)
+
+
+def next_id(model):
+    return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def skewed(rng, size, power):
+    """Номер от 0 до size - 1, малые номера выпадают чаще."""
+    return int(size * rng.random() ** power)
+
+
+def phrase(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+
+def build_users(plan, batch, rng):
+    return [
+        User(pk=pk, username=f'seed{pk}', password=plan.password)
+        for pk in plan.ids(USERS, batch)
+    ]
+
+
+def build_news(plan, batch, rng):
+    news = []
+    for pk in plan.ids(NEWS, batch):
+        number = pk - plan.bases[NEWS]
+        news.append(News(
+            pk=pk,
+            title=phrase(rng, 2, 6).capitalize()[:50],
+            text='. '.join(
+                phrase(rng, 5, 15).capitalize()
+                for _ in range(rng.randint(3, 12))
+            ) + '.',
+            date=plan.news_date(number),
+        ))
+    return news
+
+
+def build_comments(plan, batch, rng):
+    total_news = plan.counts[NEWS]
+    comments = []
+    for pk in plan.ids(COMMENTS, batch):
+        number = total_news - 1 - skewed(rng, total_news, HOT_NEWS_POWER)
+        published = timezone.make_aware(
+            datetime.combine(plan.news_date(number), time.min)
+        )
+        author_id = plan.bases[USERS] + skewed(
+            rng, plan.counts[USERS], HEAVY_COMMENTER_POWER
+        )
+        text = phrase(rng, 1, int(rng.lognormvariate(2, 0.8)) + 1)
+        created = published + (plan.now - published) * rng.random()
+        comments.append(Comment(
+            pk=pk,
+            news_id=plan.bases[NEWS] + number,
+            author_id=author_id,
+            text=text,
+            created=created,
+            modified=created,
+        ))
+    return comments
+
+
+BUILDERS = {
+    USERS: (User, build_users, None),
+    NEWS: (News, build_news, search.news_row),
+    COMMENTS: (Comment, build_comments, search.comment_row),
+}
+# Блокировка записи, общая для процессов-исполнителей.
+write_lock = None
+
+
+def init_worker(lock):
+    global write_lock
+    write_lock = lock
+
+
+@contextmanager
+def explicit_timestamps(model):
+    """Не даёт auto_now и auto_now_add затереть сгенерированные даты."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed_batch(plan, kind, batch):
+    """Создаёт одну пачку объектов; возвращает их число."""
+    model, build, index_row = BUILDERS[kind]
+    rng = random.Random(f'{plan.seed}:{kind}:{batch}')
+    objects = build(plan, batch, rng)
+    rows = [index_row(obj) for obj in objects] if index_row else []
+    with write_lock or nullcontext():
+        with transaction.atomic(), explicit_timestamps(model):
+            model.objects.bulk_create(objects)
+            search.write_rows(rows)
+    return len(objects)
+
+
+def finish(plan):
+    """
+    Сверяет счётчики комментариев у созданных новостей и строит
+    итоги архива: bulk_create обходит сигналы, которые их ведут.
+    """
+    fixed = News.objects.filter(
+        pk__gte=plan.bases[NEWS]
+    ).recount_comments()
+    NewsDayRollup.objects.rebuild()
+    return fixed
@@ -0,0 +1,77 @@
+from django.db.models import F
+from django.db.models.expressions import Combinable
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from yanews import metrics
+
+from . import search
+from .models import Comment, News, NewsDayRollup
+
+comment_writes = metrics.Counter(
+    'comment_writes_total', 'Записи комментариев.', ('action',),
+)
+
+
+@receiver(post_save, sender=News)
+def index_news(sender, instance, **kwargs):
+    search.index_news(instance)
+
+
+@receiver(post_delete, sender=News)
+def unindex_news(sender, instance, **kwargs):
+    search.unindex_news(instance)
+
+
+@receiver(pre_save, sender=News)
+def remember_date(sender, instance, **kwargs):
+    """
+    Дата до правки: новость может переехать в другой день архива.
+
+    Правка уже сохранённой новости повышает её версию, как бы она ни
+    сохранялась: формой, из shell или через loaddata. Иначе страница
+    из кеша фрагментов и её ETag остались бы прежними.
+    """
+    instance.previous_date = (
+        News.objects.filter(pk=instance.pk)
+        .values_list('date', flat=True).first()
+        if instance.pk else None
+    )
+    if instance.previous_date is not None:
+        instance.version = F('version') + 1
+
+
+@receiver(post_save, sender=News)
+def refresh_version(sender, instance, **kwargs):
+    if isinstance(instance.version, Combinable):
+        instance.refresh_from_db(fields=('version',))
+
+
+@receiver(post_save, sender=News)
+def roll_up_news(sender, instance, **kwargs):
+    days = {instance.date, instance.previous_date} - {None}
+    NewsDayRollup.objects.refresh(days)
+
+
+@receiver(post_delete, sender=News)
+def roll_up_deleted_news(sender, instance, **kwargs):
+    NewsDayRollup.objects.refresh([instance.date])
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.unindex_comment(instance)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_write(sender, instance, created, **kwargs):
+    comment_writes.inc('created' if created else 'updated')
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_delete(sender, instance, **kwargs):
+    comment_writes.inc('deleted')
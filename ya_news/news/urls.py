@@ -1,15 +1,34 @@
 from django.urls import path
-from news import views
+from news import api, views
 
 app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('archive/', views.NewsArchive.as_view(), name='archive'),
+    path(
+        'archive/<int:year>/', views.NewsArchive.as_view(),
+        name='archive_year',
+    ),
+    path(
+        'archive/<int:year>/<int:month>/', views.NewsArchive.as_view(),
+        name='archive_month',
+    ),
+    path(
+        'archive/<int:year>/<int:month>/<int:day>/',
+        views.NewsArchive.as_view(), name='archive_day',
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('api/news/', api.NewsListAPI.as_view(), name='api_list'),
+    path(
+        'api/news/<int:pk>/', api.NewsDetailAPI.as_view(), name='api_detail'
+    ),
+    path('api/export/', api.NewsExport.as_view(), name='export'),
 ]
@@ -1,11 +1,23 @@
+import hashlib
+from calendar import monthrange
+from datetime import date
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncYear
+from django.http import Http404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
+from yanews.mixins import ObjectCacheMixin
+from yanews.sqlite import atomic_with_retry
 
+from . import search
 from .forms import CommentForm
-from .models import Comment, News
+from .models import Comment, News, NewsDayRollup
+from .pagination import KeysetPaginator
 
 
 class NewsList(generic.ListView):
@@ -19,21 +31,123 @@ class NewsList(generic.ListView):
 
         Их количество определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
 
-class NewsDetail(generic.DetailView):
-    model = News
-    template_name = 'news/detail.html'
+class NewsArchive(generic.TemplateView):
+    """
+    Архив по годам, месяцам и дням.
+
+    Число новостей и комментариев за вложенные периоды берётся из
+    NewsDayRollup, а новости периода выбираются по индексу даты
+    страницами по курсору.
+    """
+    template_name = 'news/archive.html'
+    # Как группировать дни для вложенных периодов и куда они ведут.
+    LEVELS = {
+        'archive': (TruncYear, 'news:archive_year', ('year',)),
+        'year': (TruncMonth, 'news:archive_month', ('year', 'month')),
+        'month': (None, 'news:archive_day', ('year', 'month', 'day')),
+    }
+
+    def get_context_data(self, year=None, month=None, day=None, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            if day:
+                level, start = 'day', date(year, month, day)
+                end = start
+            elif month:
+                level, start = 'month', date(year, month, 1)
+                end = start.replace(day=monthrange(year, month)[1])
+            elif year:
+                level, start = 'year', date(year, 1, 1)
+                end = date(year, 12, 31)
+            else:
+                level = 'archive'
+        except ValueError:
+            raise Http404('Такой даты нет.')
+        context['level'] = level
+        if level in self.LEVELS:
+            rollup = NewsDayRollup.objects.all()
+            if level != 'archive':
+                rollup = rollup.filter(day__range=(start, end))
+            context['periods'] = self.periods(rollup, *self.LEVELS[level])
+        if level != 'archive':
+            context['start'] = start
+            paginator = KeysetPaginator(
+                News.objects.filter(date__range=(start, end)),
+                'date', settings.ARCHIVE_NEWS_PER_PAGE, descending=True,
+            )
+            context['news_page'] = paginator.page(
+                after=self.request.GET.get('after'),
+                before=self.request.GET.get('before'),
+            )
+        return context
+
+    def periods(self, rollup, trunc, url_name, parts):
+        if trunc is not None:
+            rollup = rollup.annotate(period=trunc('day')).values(
+                'period'
+            ).annotate(
+                news_count=Sum('news_count'),
+                comment_count=Sum('comment_count'),
+            ).order_by('-period')
+        else:
+            rollup = rollup.annotate(period=F('day')).values(
+                'period', 'news_count', 'comment_count'
+            )
+        periods = list(rollup)
+        for period in periods:
+            period['url'] = reverse(url_name, args=[
+                getattr(period['period'], part) for part in parts
+            ])
+        return periods
+
+
+class NewsSearch(generic.ListView):
+    """Поиск по новостям и комментариям, лучшие совпадения первыми."""
+    template_name = 'news/search.html'
+
+    def get_queryset(self):
+        return search.SearchResults(self.request.GET.get('q', ''))
+
+    def get_paginate_by(self, queryset):
+        return settings.SEARCH_RESULTS_PER_PAGE
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+class CommentPageMixin:
+    """
+    Добавляет в контекст одну страницу комментариев к новости.
+
+    Страницы выбираются по курсору из параметров after и before,
+    ?page=last открывает последнюю страницу.
+    """
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        paginator = KeysetPaginator(
+            self.object.comment_set.filter(
+                is_hidden=False
+            ).select_related('author'),
+            'created',
+            settings.COMMENTS_PER_PAGE,
+        )
+        context['comment_page'] = paginator.page(
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+            last=self.request.GET.get('page') == 'last',
         )
-        return obj
+        return context
+
+
+class NewsDetail(ObjectCacheMixin, CommentPageMixin, generic.DetailView):
+    model = News
+    template_name = 'news/detail.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -44,6 +158,8 @@ class NewsDetail(generic.DetailView):
 
 class NewsComment(
         LoginRequiredMixin,
+        ObjectCacheMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -55,37 +171,66 @@ class NewsComment(
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    @atomic_with_retry
     def form_valid(self, form):
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
         comment.save()
+        News.objects.filter(pk=self.object.pk).touch(comment_delta=1)
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '?page=last#comments'
+
+
+def news_etag(request, pk):
+    """
+    Значение ETag страницы новости без загрузки её комментариев.
+
+    Любое изменение новости или её комментариев повышает версию,
+    поэтому достаточно одного запроса по первичному ключу. В ETag входят
+    пользователь и его CSRF-cookie: от них зависят ссылки на правку
+    комментариев и форма.
+    """
+    version = News.objects.filter(pk=pk).values_list(
+        'version', flat=True
+    ).first()
+    if version is None:
+        return None
+    viewer = 'anonymous'
+    if request.user.is_authenticated:
+        csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+        viewer = hashlib.sha1(
+            f'{request.user.pk}:{csrf_cookie}'.encode()
+        ).hexdigest()[:16]
+    return f'{pk}-{version}-{viewer}'
+
+
+# Представления собираются один раз, а не на каждый запрос.
+news_detail = NewsDetail.as_view()
+news_comment = NewsComment.as_view()
 
 
 class NewsDetailView(generic.View):
 
+    @method_decorator(condition(etag_func=news_etag))
     def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        return news_detail(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        view = NewsComment.as_view()
-        return view(request, *args, **kwargs)
+        return news_comment(request, *args, **kwargs)
 
 
-class CommentBase(LoginRequiredMixin):
+class CommentBase(LoginRequiredMixin, ObjectCacheMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
@@ -98,7 +243,29 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    def form_valid(self, form):
+        # Флаг читается до записи: повтор увидел бы уже изменённый.
+        return self.save_comment(form, was_hidden=form.instance.is_hidden)
+
+    @atomic_with_retry
+    def save_comment(self, form, was_hidden):
+        # Новый текст прошёл проверку: скрытый комментарий снова виден.
+        form.instance.is_hidden = False
+        response = super().form_valid(form)
+        News.objects.filter(pk=self.object.news_id).touch(
+            comment_delta=int(was_hidden)
+        )
+        return response
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    @atomic_with_retry
+    def delete(self, request, *args, **kwargs):
+        response = super().delete(request, *args, **kwargs)
+        News.objects.filter(pk=self.object.news_id).touch(
+            comment_delta=0 if self.object.is_hidden else -1
+        )
+        return response
@@ -0,0 +1,302 @@
+"""
+Метрики сайта в текстовом формате Prometheus.
+
+Каждый процесс копит счётчики и гистограммы в памяти и не чаще раза
+в METRICS_FLUSH_INTERVAL секунд целиком переписывает их в файл
+METRICS_DIR/<pid>-<id>.json, где id выбирается случайно при старте
+и после fork. Представление view складывает файлы всех процессов,
+поэтому при нескольких pre-fork процессах любой из них отдаёт общие
+числа. Файлы завершившихся процессов не удаляются: счётчики
+Prometheus не должны уменьшаться. По той же причине процесс,
+получивший pid завершившегося, пишет в свой файл, а не поверх
+чужого. При перезапуске сервиса каталог стоит очищать; сброс
+счётчиков Prometheus переживает.
+
+MetricsMiddleware ставится перед QueryBudgetMiddleware и берёт
+у него число и время SQL-запросов.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+MISSING = object()
+
+
+def format_value(value):
+    return str(int(value)) if value == int(value) else repr(float(value))
+
+
+def escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('\n', r'\n')
+        .replace('"', r'\"')
+    )
+
+
+def label_text(names, values, **extra):
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{escape(value)}"' for name, value in pairs
+    ) + '}'
+
+
+def merge(first, second):
+    if isinstance(first, list):
+        return [a + b for a, b in zip(first, second)]
+    return first + second
+
+
+class Registry:
+    """Метрики этого процесса и их запись в файл."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lru_caches = {}
+        self.reset()
+        atexit.register(self.flush_if_dirty)
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+        """Обнуляет метрики: после fork у процесса свой файл."""
+        self.name = f'{os.getpid()}-{uuid.uuid4().hex}'
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.dirty = False
+        self.flushed = time.monotonic()
+        for metric in self.metrics.values():
+            metric.values.clear()
+        self.lru_offsets = {
+            name: function.cache_info()
+            for name, function in self.lru_caches.items()
+        }
+
+    def snapshot(self):
+        for name, function in self.lru_caches.items():
+            info, offset = function.cache_info(), self.lru_offsets[name]
+            cache_requests.set(info.hits - offset.hits, name, 'hit')
+            cache_requests.set(info.misses - offset.misses, name, 'miss')
+        with self.lock:
+            self.dirty = False
+            return {
+                name: {
+                    json.dumps(labels): value
+                    for labels, value in metric.values.items()
+                }
+                for name, metric in self.metrics.items()
+            }
+
+    def flush(self):
+        """Переписывает файл процесса целиком, через временный файл."""
+        with self.flush_lock:
+            path = self.path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_name(path.name + '.tmp')
+            temporary.write_text(json.dumps(self.snapshot()))
+            temporary.replace(path)
+            self.flushed = time.monotonic()
+
+    def path(self):
+        return Path(settings.METRICS_DIR) / f'{self.name}.json'
+
+    def flush_if_dirty(self):
+        if self.dirty:
+            self.flush()
+
+    def maybe_flush(self):
+        if (
+            time.monotonic() - self.flushed >= settings.METRICS_FLUSH_INTERVAL
+            and not self.flush_lock.locked()
+        ):
+            self.flush()
+
+    def collect(self, directory):
+        """Сумма метрик из файлов всех процессов."""
+        totals = {}
+        for path in Path(directory).glob('*.json'):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, series in data.items():
+                merged = totals.setdefault(name, {})
+                for labels, value in series.items():
+                    merged[labels] = (
+                        merge(merged[labels], value)
+                        if labels in merged else value
+                    )
+        return totals
+
+    def render(self, totals):
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for labels, value in sorted(totals.get(name, {}).items()):
+                lines.extend(metric.render(json.loads(labels), value))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+        registry.metrics[name] = self
+
+
+class Counter(Metric):
+    """Счётчик, который только растёт."""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with registry.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+            registry.dirty = True
+
+    def set(self, value, *labels):
+        with registry.lock:
+            self.values[labels] = value
+
+    def render(self, labels, value):
+        text = label_text(self.labels, labels)
+        yield f'{self.name}{text} {format_value(value)}'
+
+
+class Histogram(Metric):
+    """
+    Гистограмма: число наблюдений в каждой корзине и их сумма.
+
+    В памяти корзины не накопительные, накопительными их делает render.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with registry.lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [0] * (
+                    len(self.buckets) + 1
+                ) + [0.0]
+            series[index] += 1
+            series[-1] += value
+            registry.dirty = True
+
+    def render(self, labels, series):
+        total = 0
+        for bound, count in zip((*self.buckets, float('inf')), series):
+            total += count
+            le = '+Inf' if bound == float('inf') else format_value(bound)
+            yield (
+                f'{self.name}_bucket{label_text(self.labels, labels, le=le)} '
+                f'{total}'
+            )
+        text = label_text(self.labels, labels)
+        yield f'{self.name}_sum{text} {format_value(series[-1])}'
+        yield f'{self.name}_count{text} {total}'
+
+
+requests_total = Counter(
+    'http_requests_total', 'Запросы к сайту.', ('route', 'method', 'status'),
+)
+request_duration = Histogram(
+    'http_request_duration_seconds', 'Время ответа.', ('route', 'status'),
+)
+db_queries = Histogram(
+    'db_queries_per_request', 'SQL-запросов на запрос к сайту.',
+    ('route',), QUERY_COUNT_BUCKETS,
+)
+db_duration = Histogram(
+    'db_query_duration_seconds', 'Время SQL за запрос к сайту.', ('route',),
+)
+cache_requests = Counter(
+    'cache_requests_total', 'Обращения к кешам.', ('cache', 'result'),
+)
+
+
+def watch_lru_cache(name, function):
+    """Попадания в lru_cache функции попадут в cache_requests_total."""
+    registry.lru_caches[name] = function
+    registry.lru_offsets[name] = function.cache_info()
+
+
+class MeteredLocMemCache(LocMemCache):
+    """LocMemCache, который считает попадания в cache_requests_total."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.metrics_name = name
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version)
+        cache_requests.inc(
+            self.metrics_name, 'miss' if value is MISSING else 'hit'
+        )
+        return default if value is MISSING else value
+
+
+class MetricsMiddleware:
+    """Число и время запросов и SQL по имени URL и статусу ответа."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        route = (
+            request.resolver_match.view_name
+            if request.resolver_match else 'unresolved'
+        )
+        status = str(response.status_code)
+        method = request.method if request.method in METHODS else 'other'
+        requests_total.inc(route, method, status)
+        request_duration.observe(elapsed, route, status)
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            db_queries.observe(stats.count, route)
+            db_duration.observe(stats.duration, route)
+        registry.maybe_flush()
+        return response
+
+
+def view(request):
+    """Метрики всех процессов; доступны с адресов METRICS_ALLOWED_IPS."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise PermissionDenied
+    registry.flush()
+    return HttpResponse(
+        registry.render(registry.collect(settings.METRICS_DIR)),
+        content_type=CONTENT_TYPE,
+    )
@@ -0,0 +1,215 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('yanews.queries')
+timing_logger = logging.getLogger('yanews.timing')
+
+
+class QueryStats:
+    """Число, суммарное время и повторы SQL-запросов одного запроса."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql, repr(params)] += 1
+
+    @property
+    def duplicates(self):
+        """Сколько запросов повторяли уже выполненный с теми же данными."""
+        return sum(
+            number - 1 for number in self.statements.values() if number > 1
+        )
+
+
+def query_budget(url_name, method):
+    """
+    Бюджет SQL-запросов страницы из QUERY_BUDGETS или None.
+
+    Ключ — имя URL для GET и HEAD и пара (имя URL, метод) для
+    остальных методов: отправка формы обычно дороже её показа.
+    """
+    budgets = settings.QUERY_BUDGETS
+    if (url_name, method) in budgets:
+        return budgets[url_name, method]
+    if method in ('GET', 'HEAD'):
+        return budgets.get(url_name)
+    return None
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает SQL-запросы каждого запроса к сайту.
+
+    Статистика пишется в лог yanews.queries и в заголовки
+    X-DB-Query-Count, X-DB-Query-Time (мс) и X-DB-Duplicate-Queries.
+    Если у страницы есть бюджет (см. query_budget) и он превышен,
+    запись в логе получает уровень WARNING; по умолчанию в лог
+    попадают только такие записи.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = request.query_stats = QueryStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        url_name = (
+            request.resolver_match.view_name
+            if request.resolver_match else None
+        )
+        response['X-DB-Query-Count'] = stats.count
+        response['X-DB-Query-Time'] = f'{stats.duration * 1e3:.1f}'
+        response['X-DB-Duplicate-Queries'] = stats.duplicates
+        budget = query_budget(url_name, request.method)
+        logger.log(
+            logging.WARNING if budget is not None and stats.count > budget
+            else logging.INFO,
+            '%s %s (%s): %d queries, %.1f ms, %d duplicates',
+            request.method, request.path, url_name, stats.count,
+            stats.duration * 1e3, stats.duplicates,
+        )
+        return response
+
+
+class ServerTiming:
+    """
+    Отметки времени одного запроса и разбивка его на этапы.
+
+    Время SQL берётся из request.query_stats, который ведёт
+    QueryBudgetMiddleware, и вычитается из этапа, где запрос выполнялся.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.marks = {}
+
+    def db(self):
+        stats = getattr(self.request, 'query_stats', None)
+        return (stats.duration, stats.count) if stats else (0.0, 0)
+
+    def mark(self, name):
+        self.marks[name] = (time.perf_counter(), self.db()[0])
+
+    def phases(self, total):
+        """Длительности этапов в секундах; в сумме дают total."""
+        end = self.marks.get('end')
+        if end is None:
+            # Запрос не дошёл до разрешения URL: всё ушло на middleware.
+            db = self.db()[0]
+            return {'url': 0.0, 'view': 0.0, 'db': db, 'tpl': 0.0,
+                    'mw': total - db}
+        app = self.marks['app']
+        view = self.marks.get('view', end)
+        render = self.marks.get('render', end)
+
+        def between(start, stop):
+            return (stop[0] - start[0]) - (stop[1] - start[1])
+
+        phases = {
+            'url': between(app, view),
+            'view': between(view, render),
+            'db': self.db()[0],
+            'tpl': between(render, end),
+        }
+        phases['mw'] = total - sum(phases.values())
+        return phases
+
+
+class ServerTimingMiddleware:
+    """
+    Заголовок Server-Timing с разбивкой времени ответа.
+
+    Этапы: url — разрешение URL и process_view остальных middleware,
+    view — код представления, db — SQL, tpl — отрисовка
+    TemplateResponse, mw — остальные middleware; total — всё вместе.
+    Ставится в начало MIDDLEWARE, перед QueryBudgetMiddleware, в паре
+    с ServerTimingViewMiddleware в самом конце. При SERVER_TIMING_LOG
+    этапы пишутся ещё и в лог yanews.timing строкой JSON.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = request.server_timing = ServerTiming(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        total = time.perf_counter() - started
+        phases = timing.phases(total)
+        queries = timing.db()[1]
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={duration * 1e3:.2f}'
+            + (f';desc="{queries} SQL"' if name == 'db' else '')
+            for name, duration in (*phases.items(), ('total', total))
+        )
+        if settings.SERVER_TIMING_LOG:
+            timing_logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'url_name': (
+                    request.resolver_match.view_name
+                    if request.resolver_match else None
+                ),
+                'status': response.status_code,
+                'queries': queries,
+                **{
+                    f'{name}_ms': round(duration * 1e3, 3)
+                    for name, duration in phases.items()
+                },
+                'total_ms': round(total * 1e3, 3),
+            }))
+        return response
+
+
+class ServerTimingViewMiddleware:
+    """
+    Внутренние отметки для ServerTimingMiddleware; ставится последним.
+
+    Без отметок ServerTimingMiddleware, например если его нет в списке
+    middleware или запрос до него не дошёл, ничего не делает.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        self.mark(request, 'app')
+        response = self.get_response(request)
+        self.mark(request, 'end')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.mark(request, 'view')
+
+    def process_template_response(self, request, response):
+        self.mark(request, 'render')
+        return response
+
+    @staticmethod
+    def mark(request, name):
+        timing = getattr(request, 'server_timing', None)
+        if timing is not None:
+            timing.mark(name)
@@ -0,0 +1,31 @@
+from yanews.metrics import cache_requests
+
+
+def object_cache(request):
+    return request.__dict__.setdefault('object_cache', {})
+
+
+class ObjectCacheMixin:
+    """
+    Один запрос к базе на объект за весь запрос к сайту.
+
+    Результат get_object() запоминается на request, поэтому повторные
+    вызовы в том же представлении и в представлениях, которым запрос
+    передан дальше, получают тот же экземпляр. Ключ — модель и
+    аргументы из URL; вызовы с явным queryset не кешируются.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        cache = object_cache(self.request)
+        key = (
+            self.get_queryset().model,
+            tuple(sorted(self.kwargs.items())),
+        )
+        if key not in cache:
+            cache_requests.inc('objects', 'miss')
+            cache[key] = super().get_object()
+        else:
+            cache_requests.inc('objects', 'hit')
+        return cache[key]
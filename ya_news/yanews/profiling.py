@@ -0,0 +1,158 @@
+"""
+Выборочное профилирование запросов к сайту.
+
+SamplingProfilerMiddleware профилирует долю PROFILE_SAMPLE_RATE
+запросов сразу двумя способами: cProfile считает время по функциям,
+а поток-сэмплер раз в PROFILE_SAMPLE_INTERVAL секунд снимает стек
+обрабатывающего потока. Результаты копятся в памяти по имени URL
+и раз в PROFILE_FLUSH_EVERY профилей на маршрут сбрасываются
+в PROFILE_DIR: <маршрут>.<pid>.prof для pstats и
+<маршрут>.<pid>.collapsed — свёрнутые стеки для flamegraph.pl
+и speedscope. Число различных стеков ограничено PROFILE_MAX_STACKS,
+остальные попадают в строку [other]. Склеивает файлы всех процессов
+команда profile_report.
+
+При PROFILE_SAMPLE_RATE = 0 middleware не подключается вовсе,
+и запросы не платят за профилирование ничего.
+"""
+import atexit
+import cProfile
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+UNSAFE = re.compile(r'[^\w.-]')
+OTHER = '[other]'
+
+
+def route_file(route):
+    return UNSAFE.sub('_', route)
+
+
+def frame_name(frame):
+    code = frame.f_code
+    return f'{Path(code.co_filename).name}:{code.co_name}'
+
+
+class StackSampler:
+    """Поток, который снимает стек другого потока через равные промежутки."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+class RouteProfile:
+    """Накопленные профили одного маршрута в этом процессе."""
+
+    def __init__(self):
+        self.stats = None
+        self.stacks = Counter()
+        self.samples = 0
+
+    def add(self, profiler, stacks):
+        if self.stats is None:
+            self.stats = pstats.Stats(profiler)
+        else:
+            self.stats.add(profiler)
+        for stack, count in stacks.items():
+            if (
+                stack not in self.stacks
+                and len(self.stacks) >= settings.PROFILE_MAX_STACKS
+            ):
+                stack = OTHER
+            self.stacks[stack] += count
+        self.samples += 1
+
+    def dump(self, directory, route):
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f'{route_file(route)}.{os.getpid()}'
+        self.stats.dump_stats(directory / f'{name}.prof')
+        (directory / f'{name}.collapsed').write_text(''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.items()
+        ))
+
+
+class ProfileStore:
+    """Профили по маршрутам; запись на диск под общей блокировкой."""
+
+    def __init__(self):
+        self.routes = {}
+        self.lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def add(self, route, profiler, stacks):
+        with self.lock:
+            profile = self.routes.setdefault(route, RouteProfile())
+            profile.add(profiler, stacks)
+            if profile.samples % settings.PROFILE_FLUSH_EVERY == 0:
+                profile.dump(Path(settings.PROFILE_DIR), route)
+
+    def flush(self):
+        with self.lock:
+            for route, profile in self.routes.items():
+                profile.dump(Path(settings.PROFILE_DIR), route)
+
+
+store = ProfileStore()
+
+
+class SamplingProfilerMiddleware:
+    """
+    Профилирует случайную долю запросов; см. описание модуля.
+
+    Ставится первым, чтобы в профиль попали остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILE_SAMPLE_RATE:
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        with StackSampler(
+            threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL
+        ) as sampler:
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        route = (
+            request.resolver_match.view_name
+            if request.resolver_match else 'unresolved'
+        )
+        store.add(route, profiler, sampler.stacks)
+        return response
@@ -0,0 +1,80 @@
+"""
+Чтение новостей с реплик, запись в основную базу.
+
+Реплики — копии основной базы, которые обновляет команда
+sync_replicas, поэтому они отстают. С реплик читают только запросы
+к сайту, которые пропустил ReplicaPinMiddleware; команды и всё прочее
+работают с основной базой. Чтобы пользователь сразу видел свой
+комментарий, после любой записи его запросы на время
+PRIMARY_PIN_SECONDS читают из основной базы: об этом помнит cookie,
+которую ставит middleware.
+"""
+import random
+
+from asgiref.local import Local
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Флаги текущего запроса: можно ли ему читать с реплик
+# и была ли в нём запись.
+state = Local()
+
+REPLICATED_APPS = {'news'}
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if (
+            model._meta.app_label not in REPLICATED_APPS
+            or not getattr(state, 'replicas', False)
+            or getattr(state, 'wrote', False)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.NEWS_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in REPLICATED_APPS:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.NEWS_REPLICAS}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает на реплики вместе с данными.
+        return db not in settings.NEWS_REPLICAS
+
+
+class ReplicaPinMiddleware:
+    """
+    Закрепляет за основной базой пользователя, который только что писал.
+
+    Без реплик не подключается вовсе.
+    """
+
+    def __init__(self, get_response):
+        if not settings.NEWS_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state.replicas = (
+            request.method in ('GET', 'HEAD')
+            and settings.PRIMARY_PIN_COOKIE not in request.COOKIES
+        )
+        state.wrote = False
+        try:
+            response = self.get_response(request)
+            if state.wrote:
+                response.set_cookie(
+                    settings.PRIMARY_PIN_COOKIE, '1',
+                    max_age=settings.PRIMARY_PIN_SECONDS,
+                    httponly=True, samesite='Lax',
+                )
+            return response
+        finally:
+            state.replicas = state.wrote = False
@@ -21,6 +21,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.profiling.SamplingProfilerMiddleware',
+    'yanews.middleware.ServerTimingMiddleware',
+    'yanews.metrics.MetricsMiddleware',
+    'yanews.middleware.QueryBudgetMiddleware',
+    'yanews.routers.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -28,6 +33,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yanews.middleware.ServerTimingViewMiddleware',
 ]
 
 ROOT_URLCONF = 'yanews.urls'
@@ -49,6 +55,22 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yanews.wsgi.application'
+# Прогревать ли процесс при загрузке yanews.wsgi, см. yanews/warmup.py.
+WARMUP_ON_START = not DEBUG
+# Выборочное профилирование, см. yanews/profiling.py; 0 — выключено.
+PROFILE_SAMPLE_RATE = 0.0
+PROFILE_SAMPLE_INTERVAL = 0.001
+PROFILE_FLUSH_EVERY = 20
+PROFILE_MAX_STACKS = 5000
+PROFILE_DIR = BASE_DIR / 'profiles'
+# Заголовок Server-Timing и, по желанию, строка в логе yanews.timing.
+SERVER_TIMING = True
+SERVER_TIMING_LOG = False
+# Метрики Prometheus, см. yanews/metrics.py: каталог с файлами
+# процессов, как часто их переписывать и кому отдавать /metrics/.
+METRICS_DIR = BASE_DIR / 'metrics'
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
 
 
 DATABASES = {
@@ -58,10 +80,87 @@ DATABASES = {
     }
 }
 
+# PRAGMA для каждого нового соединения с SQLite, см. yanews/sqlite.py.
+# cache_size отрицательный — размер в КиБ, а не в страницах.
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+}
+SQLITE_PROFILE = 'production'
+# Сколько раз повторить транзакцию записи, если база занята,
+# и начальная пауза в секундах; каждая следующая вдвое длиннее.
+SQLITE_WRITE_RETRIES = 5
+SQLITE_RETRY_DELAY = 0.02
+
+# Реплики для чтения новостей: копии основной базы, которые обновляет
+# команда sync_replicas, например NEWS_REPLICAS = ['replica1'].
+# После записи пользователь PRIMARY_PIN_SECONDS читает из основной
+# базы; окно должно быть больше интервала синхронизации.
+NEWS_REPLICAS = []
+PRIMARY_PIN_SECONDS = 30
+PRIMARY_PIN_COOKIE = 'pin_primary'
+DATABASES.update({
+    alias: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'{alias}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+    for alias in NEWS_REPLICAS
+})
+DATABASE_ROUTERS = ['yanews.routers.PrimaryReplicaRouter']
+
+
+# Ключи фрагментов содержат версию новости, поэтому срок жизни не нужен:
+# устаревшие записи просто вытесняются.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'fragments': {
+        'BACKEND': 'yanews.metrics.MeteredLocMemCache',
+        'LOCATION': 'fragments',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # INFO — строка на каждый запрос, WARNING — только превышения
+        # бюджета.
+        'yanews.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+        'yanews.warmup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'yanews.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+
 LANGUAGE_CODE = 'ru'
 
 TIME_ZONE = 'Europe/Moscow'
@@ -80,3 +179,34 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 FORM_DATA = {'text': 'Comment text'}
 NEWS_COUNT_ON_HOME_PAGE = 10
+COMMENTS_PER_PAGE = 50
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+EXPORT_CHUNK_SIZE = 500
+# Админка: сколько комментариев показывать на странице новости
+# и с какого размера таблицы не считать строки точно.
+ADMIN_INLINE_COMMENTS = 20
+ADMIN_EXACT_COUNT_LIMIT = 100_000
+# Прогресс команды remoderate.
+MODERATION_CHECKPOINT = BASE_DIR / 'moderation.json'
+SEARCH_RESULTS_PER_PAGE = 10
+ARCHIVE_NEWS_PER_PAGE = 20
+
+# Сколько SQL-запросов может сделать страница; проверяется тестами.
+# Имя URL — бюджет GET, пара (имя URL, метод) — остальных методов.
+QUERY_BUDGETS = {
+    'news:home': 1,
+    'news:detail': 5,
+    ('news:detail', 'POST'): 9,
+    'news:edit': 4,
+    ('news:edit', 'POST'): 8,
+    'news:delete': 4,
+    ('news:delete', 'POST'): 9,
+    'news:search': 4,
+    'news:archive': 1,
+    'news:archive_year': 2,
+    'news:archive_month': 2,
+    'news:archive_day': 1,
+    'news:api_list': 1,
+    'news:api_detail': 3,
+}
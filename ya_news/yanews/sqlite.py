@@ -0,0 +1,64 @@
+"""
+Настройка соединений SQLite и повтор записи при занятой базе.
+
+PRAGMA из профиля settings.SQLITE_PROFILES[SQLITE_PROFILE] выполняются
+для каждого нового соединения. В режиме WAL читатели не ждут писателя,
+но писатель по-прежнему один, а транзакция, которая начала с чтения
+и пытается писать после чужого коммита, сразу получает
+«database is locked» без ожидания busy_timeout. Такие транзакции
+повторяются целиком с растущей паузой.
+"""
+import logging
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('yanews.sqlite')
+
+
+@receiver(connection_created)
+def apply_profile(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = settings.SQLITE_PROFILES[settings.SQLITE_PROFILE]
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(error):
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+def atomic_with_retry(func):
+    """
+    Выполняет func в транзакции и повторяет её, если база занята.
+
+    Внутри внешней транзакции повторять нечего: откатится и она,
+    поэтому ошибка пробрасывается сразу.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        retries = settings.SQLITE_WRITE_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as error:
+                if (
+                    attempt == retries or connection.in_atomic_block
+                    or not is_locked(error)
+                ):
+                    raise
+                delay = settings.SQLITE_RETRY_DELAY * 2 ** attempt
+                logger.info(
+                    '%s: база занята, повтор через %.3f с',
+                    func.__qualname__, delay,
+                )
+                time.sleep(delay * random.uniform(0.5, 1.5))
+    return wrapper
@@ -0,0 +1,148 @@
+"""
+Прогрев процесса до первого запроса.
+
+Новый процесс на первых запросах импортирует представления и формы,
+заполняет таблицы URL, загружает переводы и компилирует шаблоны.
+warm_up делает всё это заранее и возвращает время каждого этапа.
+Скомпилированные шаблоны сохраняются, только если включён кеширующий
+загрузчик: Django подключает его сам при DEBUG = False.
+
+Запуск модуля измеряет холодный старт целиком, вместе с импортом
+Django и django.setup(), и печатает результат в JSON:
+
+    python -m yanews.warmup
+"""
+import json
+import logging
+import os
+import time
+from importlib import import_module
+from importlib.util import find_spec
+from pathlib import Path
+
+logger = logging.getLogger('yanews.warmup')
+
+# Модули приложений, которые импортируются лениво на первых запросах.
+APP_MODULES = ('views', 'forms', 'admin')
+
+
+def import_modules():
+    from django.apps import apps
+    from django.conf import settings
+
+    import_module(settings.ROOT_URLCONF)
+    imported = 1
+    base = os.path.abspath(settings.BASE_DIR)
+    for app in apps.get_app_configs():
+        # Только приложения проекта, не Django и не сторонние пакеты.
+        path = os.path.abspath(app.path)
+        if os.path.commonpath((path, base)) != base:
+            continue
+        for name in APP_MODULES:
+            module = f'{app.name}.{name}'
+            if find_spec(module) is not None:
+                import_module(module)
+                imported += 1
+    return imported
+
+
+def populate_urls():
+    from django.urls import get_resolver
+
+    resolvers = [get_resolver()]
+    populated = 0
+    while resolvers:
+        resolver = resolvers.pop()
+        # Обращение к reverse_dict заполняет таблицы резолвера.
+        populated += len(resolver.reverse_dict)
+        for _, (_, namespaced) in resolver.namespace_dict.items():
+            resolvers.append(namespaced)
+    return populated
+
+
+def load_translations():
+    from django.conf import settings
+    from django.utils import translation
+
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('')
+    return 1
+
+
+def compile_templates():
+    from django.template import engines
+
+    compiled = 0
+    for engine in engines.all():
+        for directory in engine.dirs:
+            for path in sorted(Path(directory).rglob('*.html')):
+                engine.get_template(
+                    path.relative_to(directory).as_posix()
+                )
+                compiled += 1
+    return compiled
+
+
+PHASES = (
+    ('imports', import_modules),
+    ('urls', populate_urls),
+    ('translations', load_translations),
+    ('templates', compile_templates),
+)
+
+
+def warm_up():
+    """Выполняет этапы прогрева; возвращает [(этап, секунды, объектов)]."""
+    report = []
+    for name, phase in PHASES:
+        started = time.perf_counter()
+        count = phase()
+        report.append((name, time.perf_counter() - started, count))
+    return report
+
+
+def templates_cached():
+    """Сохраняет ли шаблонизатор скомпилированные шаблоны."""
+    from django.template import engines
+    from django.template.loaders.cached import Loader
+
+    return all(
+        any(
+            isinstance(loader, Loader)
+            for loader in engine.engine.template_loaders
+        )
+        for engine in engines.all()
+    )
+
+
+def log_report(report):
+    logger.info(
+        'Прогрев: %s',
+        ', '.join(
+            f'{name} {seconds * 1e3:.1f} мс ({count})'
+            for name, seconds, count in report
+        ),
+    )
+
+
+def as_json(report):
+    return json.dumps([
+        {'phase': name, 'ms': round(seconds * 1e3, 3), 'count': count}
+        for name, seconds, count in report
+    ])
+
+
+def main():
+    started = time.perf_counter()
+    import django
+    report = [('import django', time.perf_counter() - started, 1)]
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    started = time.perf_counter()
+    django.setup()
+    report.append(('django.setup', time.perf_counter() - started, 1))
+    report.extend(warm_up())
+    print(as_json(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -8,9 +8,20 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 """
 
 import os
+import time
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
+from yanews import warmup
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
+started = time.perf_counter()
 application = get_wsgi_application()
+
+if settings.WARMUP_ON_START:
+    warmup.log_report(
+        [('django.setup', time.perf_counter() - started, 1)]
+        + warmup.warm_up()
+    )
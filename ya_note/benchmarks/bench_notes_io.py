@@ -0,0 +1,77 @@
+"""
+Скорость import_notes и export_notes.
+
+Во временном каталоге создаётся JSONL на --notes заметок, он
+загружается в отдельный файл SQLite и выгружается обратно. Запуск
+из каталога ya_note:
+
+    python -m benchmarks.bench_notes_io --notes 1000000
+"""
+import argparse
+import json
+import resource
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from benchmarks.common import setup_django
+
+AUTHORS = 100
+
+
+def write_source(path, total):
+    with open(path, 'w', encoding='utf-8') as output:
+        for index in range(total):
+            output.write(json.dumps({
+                'title': f'Заметка {index % 1000}',
+                'text': 'Текст заметки. ' * 20,
+                'slug': '',
+                'author': f'user{index % AUTHORS}',
+            }, ensure_ascii=False))
+            output.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=1_000_000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        setup_django(directory / 'bench.sqlite3')
+        from django.contrib.auth import get_user_model
+        from django.core.management import call_command
+
+        call_command('migrate', verbosity=0)
+        get_user_model().objects.bulk_create(
+            get_user_model()(username=f'user{index}', password='!')
+            for index in range(AUTHORS)
+        )
+        source = directory / 'source.jsonl'
+        write_source(source, args.notes)
+
+        start = time.perf_counter()
+        call_command(
+            'import_notes', str(source), batch_size=args.batch_size,
+            stdout=StringIO(),
+        )
+        elapsed = time.perf_counter() - start
+        print(f'import: {args.notes / elapsed:10.0f} notes/s '
+              f'({elapsed:.1f} s)')
+
+        start = time.perf_counter()
+        call_command(
+            'export_notes', output=str(directory / 'export.jsonl'),
+            stderr=StringIO(),
+        )
+        elapsed = time.perf_counter() - start
+        print(f'export: {args.notes / elapsed:10.0f} notes/s '
+              f'({elapsed:.1f} s)')
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f'peak RSS: {peak / 1024:.0f} MiB')
+
+
+if __name__ == '__main__':
+    main()
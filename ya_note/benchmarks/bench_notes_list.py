@@ -0,0 +1,96 @@
+"""
+План и время запроса списка заметок пользователя.
+
+В SQLite индекс внешнего ключа author_id хранит и rowid, то есть уже
+является индексом (author_id, id): отдельный составной индекс его бы
+дублировал. Скрипт показывает, что выборка с сортировкой по id идёт
+по этому индексу без временного B-дерева. Данные генерируются
+во временном файле SQLite. Запуск из каталога ya_note:
+
+    python -m benchmarks.bench_notes_list --users 10000 --notes 1000000
+"""
+import argparse
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import measure, setup_django, summary
+
+BATCH_SIZE = 50_000
+
+
+def seed(connection, users_total, notes_total, rng):
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO auth_user (id, password, is_superuser, username, "
+            "first_name, last_name, email, is_staff, is_active, "
+            "date_joined) VALUES (%s, '!', 0, %s, '', '', '', 0, 1, "
+            "'2020-01-01 00:00:00')",
+            [(pk, f'user{pk}') for pk in range(1, users_total + 1)],
+        )
+        for first in range(1, notes_total + 1, BATCH_SIZE):
+            cursor.executemany(
+                'INSERT INTO notes_note (id, title, text, slug, author_id, '
+                "modified) VALUES (%s, %s, 'Note text', %s, %s, "
+                "'2020-01-01 00:00:00')",
+                [
+                    (pk, f'Note {pk}', f'note-{pk}',
+                     rng.randint(1, users_total))
+                    for pk in range(
+                        first, min(first + BATCH_SIZE, notes_total + 1)
+                    )
+                ],
+            )
+
+
+captured_sql = []
+captured_params = []
+
+
+def capture_sql(execute, sql, params, many, context):
+    captured_sql.append(sql)
+    captured_params.append(params)
+    return execute(sql, params, many, context)
+
+
+def report(connection, repeat):
+    from notes.models import Note
+
+    def notes_list():
+        return list(Note.objects.filter(author_id=1).order_by('id'))
+
+    with connection.execute_wrapper(capture_sql):
+        notes_list()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'EXPLAIN QUERY PLAN ' + captured_sql[-1], captured_params[-1]
+        )
+        plan = '; '.join(row[-1] for row in cursor.fetchall())
+    print(f'{"notes list":>12}: {summary(measure(notes_list, repeat))}')
+    print(f'{"":>12}  {plan}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--notes', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'bench.sqlite3')
+        from django.core.management import call_command
+        from django.db import connection, transaction
+
+        call_command('migrate', verbosity=0)
+        with transaction.atomic():
+            seed(connection, args.users, args.notes,
+                 random.Random(args.seed))
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        report(connection, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Задержка поиска по заметкам на большой базе.
+
+Заметки вставляются во временный файл SQLite вместе с работающими
+триггерами индекса. Запуск из каталога ya_note:
+
+    python -m benchmarks.bench_search --notes 5000000
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import measure, setup_django, summary
+
+BATCH_SIZE = 50_000
+WORDS = (
+    'список покупок встреча проект отчёт идея рецепт книга фильм '
+    'поездка задача звонок письмо код тест релиз ошибка план'
+).split()
+QUERIES = ('покупок', 'рецепт борща', 'отч', 'редкоеслово')
+
+
+def seed(connection, users_total, notes_total, rng):
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO auth_user (id, password, is_superuser, username, "
+            "first_name, last_name, email, is_staff, is_active, "
+            "date_joined) VALUES (%s, '!', 0, %s, '', '', '', 0, 1, "
+            "'2020-01-01 00:00:00')",
+            [(pk, f'user{pk}') for pk in range(1, users_total + 1)],
+        )
+        for first in range(1, notes_total + 1, BATCH_SIZE):
+            cursor.executemany(
+                'INSERT INTO notes_note (id, title, text, slug, author_id, '
+                "modified) VALUES (%s, %s, %s, %s, %s, "
+                "'2020-01-01 00:00:00')",
+                [
+                    (pk,
+                     ' '.join(rng.choices(WORDS, k=3)),
+                     ' '.join(rng.choices(WORDS, k=60)),
+                     f'note-{pk}',
+                     # Немного пользователей с тысячами заметок.
+                     min(int(rng.paretovariate(1.0)), users_total))
+                    for pk in range(
+                        first, min(first + BATCH_SIZE, notes_total + 1)
+                    )
+                ],
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--notes', type=int, default=5_000_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'bench.sqlite3')
+        from django.conf import settings
+        from django.core.management import call_command
+        from django.db import connection, transaction
+
+        from notes import search
+
+        call_command('migrate', verbosity=0)
+        start = time.perf_counter()
+        with transaction.atomic():
+            seed(connection, args.users, args.notes,
+                 random.Random(args.seed))
+        print(f'indexed insert: '
+              f'{args.notes / (time.perf_counter() - start):.0f} notes/s')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT author_id, COUNT(*) FROM notes_note '
+                'GROUP BY author_id ORDER BY 2 DESC LIMIT 1'
+            )
+            heavy_user, heavy_notes = cursor.fetchone()
+        for user, label in ((heavy_user, f'{heavy_notes} notes'),
+                            (args.users, 'light user')):
+            for query in QUERIES:
+                timings = measure(
+                    lambda: search.search(
+                        user, query, settings.NOTES_SEARCH_LIMIT
+                    ),
+                    args.repeat,
+                )
+                print(f'{label:>14} {query!r:>16}: {summary(timings)}')
+
+
+if __name__ == '__main__':
+    main()
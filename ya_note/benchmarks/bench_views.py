@@ -0,0 +1,170 @@
+"""
+Задержка, SQL-запросы и память страниц YaNote на разных объёмах данных.
+
+Для каждого размера данные создаются командой seed во временном файле
+SQLite, а страницы запрашиваются тестовым клиентом через все
+middleware. Результаты пишутся в JSON и сравниваются с базовой линией
+benchmarks/baseline.json; при регрессии код выхода 1. Запуск из
+каталога ya_note:
+
+    python -m benchmarks.bench_views --sizes small,medium
+    python -m benchmarks.bench_views --update-baseline
+"""
+import argparse
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from benchmarks.common import (calibrate, compare, profile_view,
+                               read_json, setup_django, write_json)
+
+BASELINE = Path(__file__).with_name('baseline.json')
+# Параметры команды seed для каждого размера.
+SIZES = {
+    'small': dict(users=100, notes=2_000),
+    'medium': dict(users=1_000, notes=20_000),
+    'large': dict(users=10_000, notes=200_000),
+}
+# Дата фиксирована, чтобы данные совпадали от запуска к запуску.
+UNTIL = date(2024, 1, 1)
+PASSWORD = 'password'
+# Вход и регистрация упираются в хеширование пароля, повторов меньше.
+SLOW_REPEAT = 5
+
+
+def scenarios(client, anonymous):
+    from django.contrib.auth import get_user_model
+    from django.urls import reverse
+
+    from notes.models import Note
+
+    # У первого созданного пользователя больше всего заметок.
+    author = get_user_model().objects.order_by('pk').first()
+    client.force_login(author)
+    note = Note.objects.filter(author=author).order_by('pk').first()
+    detail = reverse('notes:detail', args=(note.slug,))
+    add = reverse('notes:add')
+    edit = reverse('notes:edit', args=(note.slug,))
+    edit_data = {'title': note.title, 'text': 'Текст', 'slug': note.slug}
+    login = reverse('users:login')
+    credentials = {'username': author.username, 'password': PASSWORD}
+    return {
+        'notes:home': (lambda: anonymous.get(reverse('notes:home')), None),
+        'notes:list': (lambda: client.get(reverse('notes:list')), None),
+        'notes:detail': (lambda: client.get(detail), None),
+        'notes:add': (lambda: client.get(add), None),
+        'notes:add post': (
+            lambda: client.post(add, {'title': 'Заметка', 'text': 'Текст'}),
+            None,
+        ),
+        'notes:edit post': (lambda: client.post(edit, edit_data), None),
+        'notes:search': (
+            lambda: client.get(reverse('notes:search'), {'q': 'молоко'}),
+            None,
+        ),
+        'users:login': (lambda: anonymous.get(login), None),
+        'users:login post': (
+            lambda: anonymous.post(login, credentials), SLOW_REPEAT
+        ),
+        'users:signup': (
+            lambda: anonymous.get(reverse('users:signup')), None
+        ),
+    }
+
+
+def run_size(size, repeat):
+    from django.core.management import call_command
+    from django.db import connections
+    from django.test import Client
+
+    call_command('flush', interactive=False, verbosity=0)
+    call_command(
+        'seed', until=UNTIL, password=PASSWORD, stdout=sys.stderr,
+        **SIZES[size],
+    )
+    connections['default'].cursor().execute('ANALYZE')
+    results = {}
+    for name, (request, scenario_repeat) in scenarios(
+        Client(), Client()
+    ).items():
+        results[name] = profile_view(request, scenario_repeat or repeat)
+        print(
+            f'{size:>8} {name:>26}: p50 {results[name]["p50_ms"]:9.3f} ms, '
+            f'p95 {results[name]["p95_ms"]:9.3f} ms, '
+            f'{results[name]["queries"]:3} SQL, '
+            f'{results[name]["peak_kib"]:9.1f} KiB'
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--sizes', default='small,medium',
+        help=f'Через запятую из: {", ".join(SIZES)}.',
+    )
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', help='Куда записать результаты.')
+    parser.add_argument('--baseline', default=str(BASELINE))
+    parser.add_argument(
+        '--update-baseline', action='store_true',
+        help='Записать результаты как новую базовую линию.',
+    )
+    parser.add_argument(
+        '--latency-tolerance', type=float, default=0.75,
+        help='Допустимый относительный рост медианы задержки.',
+    )
+    parser.add_argument(
+        '--tail-tolerance', type=float, default=2.0,
+        help='Допустимый относительный рост p95.',
+    )
+    parser.add_argument(
+        '--memory-tolerance', type=float, default=0.5,
+        help='Допустимый относительный рост пика памяти.',
+    )
+    parser.add_argument(
+        '--query-tolerance', type=int, default=0,
+        help='Допустимое число лишних SQL-запросов.',
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'bench.sqlite3')
+        from django.core.management import call_command
+        from django.test.utils import setup_test_environment
+
+        setup_test_environment()
+        call_command('migrate', verbosity=0)
+        results = {
+            'calibration_ms': calibrate(),
+            'sizes': {
+                size: run_size(size, args.repeat)
+                for size in args.sizes.split(',')
+            },
+        }
+
+    if args.output:
+        write_json(args.output, results)
+    if args.update_baseline:
+        write_json(args.baseline, results)
+        return
+    if not Path(args.baseline).exists():
+        print('Базовой линии нет, сравнивать не с чем.')
+        return
+    regressions = compare(
+        results, read_json(args.baseline),
+        latency=args.latency_tolerance,
+        tail=args.tail_tolerance,
+        memory=args.memory_tolerance,
+        queries=args.query_tolerance,
+    )
+    for regression in regressions:
+        print(f'РЕГРЕССИЯ {regression}')
+    if regressions:
+        sys.exit(1)
+    print('Регрессий нет.')
+
+
+if __name__ == '__main__':
+    main()
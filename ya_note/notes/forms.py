@@ -1,8 +1,8 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from pytils.translit import slugify
 
 from .models import Note
+from .slugs import slug_from_title, unique_slug
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
 
@@ -15,12 +15,19 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
+        """
+        Обрабатывает случай, если slug не уникален.
+
+        Slug из заголовка подбирается свободным автоматически, а занятый
+        slug, заданный вручную, отклоняется.
+        """
         cleaned_data = super().clean()
         slug = cleaned_data.get('slug')
         if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
+            title = cleaned_data.get('title', '')
+            return unique_slug(
+                slug_from_title(title), exclude_pk=self.instance.pk
+            )
         if Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает заметки в JSONL: одна заметка — одна строка '
+        'с полями title, text, slug и author.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки, по умолчанию stdout.',
+        )
+        parser.add_argument(
+            '--author', help='Выгрузить заметки только этого пользователя.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        queryset = Note.objects.order_by('id')
+        if options['author']:
+            queryset = queryset.filter(author__username=options['author'])
+        rows = queryset.values_list(
+            'title', 'text', 'slug', 'author__username'
+        ).iterator(chunk_size=options['chunk_size'])
+        output = (
+            self.stdout if options['output'] == '-'
+            else open(options['output'], 'w', encoding='utf-8')
+        )
+        total = 0
+        try:
+            for title, text, slug, author in rows:
+                # Строка пишется целиком: OutputWrapper stdout добавил бы
+                # перевод строки к каждому вызову write.
+                output.write(json.dumps(
+                    {'title': title, 'text': text, 'slug': slug,
+                     'author': author},
+                    ensure_ascii=False,
+                ) + '\n')
+                total += 1
+        finally:
+            if output is not self.stdout:
+                output.close()
+        self.stderr.write(f'Выгружено заметок: {total}')
@@ -0,0 +1,126 @@
+import json
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from notes.models import Note
+from notes.slugs import assign_slugs
+
+User = get_user_model()
+REQUIRED_FIELDS = ('title', 'text')
+
+
+def parse_record(number, line):
+    """
+    Запись из строки JSONL.
+
+    Как и в форме, заголовок и текст обязательны: без заголовка
+    заметка получила бы пустой slug, недоступный по адресу.
+    """
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as error:
+        raise CommandError(f'Строка {number}: {error}')
+    if not isinstance(record, dict):
+        raise CommandError(f'Строка {number}: ожидался объект JSON.')
+    for field in REQUIRED_FIELDS:
+        value = record.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise CommandError(f'Строка {number}: не заполнено поле {field}.')
+    return record
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает заметки из JSONL, который создаёт export_notes. '
+        'Каждая пачка сохраняется одним bulk_create в своей транзакции, '
+        'совпадающие slug получают суффиксы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл JSONL, «-» — читать из stdin.',
+        )
+        parser.add_argument(
+            '--author',
+            help='Сделать автором всех заметок этого пользователя.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        source = (
+            sys.stdin if options['path'] == '-'
+            else open(options['path'], encoding='utf-8')
+        )
+        self.authors = {}
+        if options['author']:
+            try:
+                author_id = User.objects.values_list(
+                    'pk', flat=True
+                ).get(username=options['author'])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'Пользователь {options["author"]} не найден.'
+                )
+        else:
+            author_id = None
+        imported = skipped = 0
+        started = time.perf_counter()
+        try:
+            lines = enumerate(source, start=1)
+            while True:
+                batch = list(islice(lines, options['batch_size']))
+                if not batch:
+                    break
+                notes = self.build_notes(batch, author_id)
+                skipped += len(batch) - len(notes)
+                with transaction.atomic():
+                    Note.objects.bulk_create(assign_slugs(notes))
+                imported += len(notes)
+                rate = imported / (time.perf_counter() - started)
+                self.stdout.write(
+                    f'Загружено: {imported}, пропущено: {skipped}, '
+                    f'{rate:.0f} заметок/с'
+                )
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+    def build_notes(self, batch, author_id):
+        """Заметки из строк пачки; записи без автора пропускаются."""
+        records = [
+            parse_record(number, line)
+            for number, line in batch if line.strip()
+        ]
+        if author_id is None:
+            self.resolve_authors(
+                {record.get('author') for record in records}
+            )
+        notes = []
+        for record in records:
+            note_author = author_id or self.authors.get(record.get('author'))
+            if note_author is None:
+                continue
+            notes.append(Note(
+                title=record['title'],
+                text=record['text'],
+                slug=record.get('slug') or '',
+                author_id=note_author,
+            ))
+        return notes
+
+    def resolve_authors(self, usernames):
+        """Запоминает id пользователей, которых ещё не искали."""
+        missing = usernames - self.authors.keys()
+        if not missing:
+            return
+        self.authors.update(dict.fromkeys(missing))
+        self.authors.update(
+            User.objects.filter(username__in=missing).values_list(
+                'username', 'pk'
+            )
+        )
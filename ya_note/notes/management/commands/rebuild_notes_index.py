@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from notes import search
+
+
+class Command(BaseCommand):
+    help = 'Восстанавливает поисковый индекс заметок и его триггеры.'
+
+    def handle(self, *args, **options):
+        search.rebuild()
+        self.stdout.write('Поисковый индекс перестроен.')
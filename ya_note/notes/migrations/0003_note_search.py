@@ -0,0 +1,41 @@
+# Generated by Django 3.2.15 on 2026-10-17 07:20
+
+from django.db import migrations
+
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE notes_note_fts USING fts5("
+    "title, text, author_id, content='notes_note', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note "
+    "BEGIN INSERT INTO notes_note_fts(rowid, title, text, author_id) "
+    "VALUES (new.id, new.title, new.text, new.author_id); END",
+    "CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note "
+    "BEGIN INSERT INTO notes_note_fts("
+    "notes_note_fts, rowid, title, text, author_id) "
+    "VALUES ('delete', old.id, old.title, old.text, old.author_id); END",
+    "CREATE TRIGGER notes_note_fts_update "
+    "AFTER UPDATE OF title, text, author_id ON notes_note "
+    "BEGIN INSERT INTO notes_note_fts("
+    "notes_note_fts, rowid, title, text, author_id) "
+    "VALUES ('delete', old.id, old.title, old.text, old.author_id); "
+    "INSERT INTO notes_note_fts(rowid, title, text, author_id) "
+    "VALUES (new.id, new.title, new.text, new.author_id); END",
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+)
+DROP_SQL = (
+    "DROP TRIGGER notes_note_fts_update",
+    "DROP TRIGGER notes_note_fts_delete",
+    "DROP TRIGGER notes_note_fts_insert",
+    "DROP TABLE notes_note_fts",
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_modified'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+    ]
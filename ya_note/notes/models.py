@@ -26,6 +26,7 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    modified = models.DateTimeField('Изменена', auto_now=True)
 
     def __str__(self):
         return self.title
@@ -0,0 +1,73 @@
+"""
+Полнотекстовый поиск по заметкам на SQLite FTS5.
+
+Индекс notes_note_fts хранит только словарь: тексты берутся
+из notes_note (external content), а триггеры обновляют индекс
+при добавлении, изменении и удалении заметок. Колонка author_id тоже
+индексируется, поэтому условие на автора сужает поиск по индексу
+до заметок пользователя, а не фильтрует все совпадения.
+
+Если миграция пересоздаст таблицу notes_note, SQLite удалит и её
+триггеры: команда rebuild_notes_index создаёт их заново.
+"""
+import re
+
+from django.db import connection
+
+TABLE = 'notes_note_fts'
+SCHEMA = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "title, text, author_id, content='notes_note', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {TABLE}_insert AFTER INSERT ON notes_note "
+    f"BEGIN INSERT INTO {TABLE}(rowid, title, text, author_id) "
+    "VALUES (new.id, new.title, new.text, new.author_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABLE}_delete AFTER DELETE ON notes_note "
+    f"BEGIN INSERT INTO {TABLE}({TABLE}, rowid, title, text, author_id) "
+    "VALUES ('delete', old.id, old.title, old.text, old.author_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABLE}_update "
+    "AFTER UPDATE OF title, text, author_id ON notes_note "
+    f"BEGIN INSERT INTO {TABLE}({TABLE}, rowid, title, text, author_id) "
+    "VALUES ('delete', old.id, old.title, old.text, old.author_id); "
+    f"INSERT INTO {TABLE}(rowid, title, text, author_id) "
+    "VALUES (new.id, new.title, new.text, new.author_id); END",
+)
+# Совпадение в заголовке весит больше, чем в тексте; автор не влияет.
+RANK = f'bm25({TABLE}, 10.0, 1.0, 0.0)'
+WORD = re.compile(r'\w+')
+
+
+def match_expression(query, author_id):
+    """
+    Запрос FTS5 из пользовательского ввода.
+
+    Каждое слово берётся в кавычки как префикс, поэтому операторы
+    FTS5 в запросе не срабатывают и не приводят к ошибке синтаксиса.
+    """
+    words = WORD.findall(query)
+    if not words:
+        return None
+    terms = ' '.join(f'"{word}"*' for word in words)
+    return f'author_id:"{author_id}" AND {{title text}}:({terms})'
+
+
+def search(author_id, query, limit):
+    """Id заметок автора, подходящих под запрос, от лучших к худшим."""
+    expression = match_expression(query, author_id)
+    if expression is None:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+            f'ORDER BY {RANK} LIMIT %s',
+            (expression, limit),
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def rebuild():
+    """Создаёт индекс и триггеры, если их нет, и перестраивает индекс."""
+    with connection.cursor() as cursor:
+        for statement in SCHEMA:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')")
@@ -0,0 +1,159 @@
+"""
+Синтетические данные для замеров на больших объёмах.
+
+Всё создаваемое определяется зерном: пачка номер N каждого вида
+строится своим генератором случайных чисел, поэтому результат
+не зависит от того, сколько процессов делят пачки между собой.
+Идентификаторы задаются явно, и у каждой пачки свой непересекающийся
+диапазон. Процессы параллельно строят объекты, а пишут по очереди:
+SQLite допускает одного писателя, а конкурирующие транзакции
+получают «database is locked».
+
+Распределение неравномерное: у немногих активных авторов большая
+часть заметок, а длина текста распределена логнормально, так что
+среди коротких заметок попадаются очень длинные.
+"""
+import random
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Note
+
+User = get_user_model()
+
+USERS, NOTES = 'users', 'notes'
+# При 3 на 10% авторов приходится почти половина заметок.
+HEAVY_AUTHOR_POWER = 3
+# Медиана около 150 слов, у каждой сотой заметки больше 2500.
+TEXT_WORDS_MU, TEXT_WORDS_SIGMA = 5, 1.2
+MAX_TEXT_WORDS = 20000
+WORDS = (
+    'заметка', 'список', 'покупки', 'молоко', 'хлеб', 'встреча', 'звонок',
+    'проект', 'задача', 'срок', 'отчёт', 'план', 'неделя', 'понедельник',
+    'пятница', 'утро', 'вечер', 'идея', 'книга', 'статья', 'ссылка',
+    'рецепт', 'тренировка', 'поездка', 'билеты', 'гостиница', 'подарок',
+    'день', 'рождения', 'врач', 'анализы', 'ремонт', 'кухня', 'счёт',
+    'оплата', 'налог', 'пароль', 'адрес', 'телефон', 'код', 'ошибка',
+    'релиз', 'сервер', 'база', 'данных', 'запрос', 'тест', 'обзор',
+    'новый', 'важный', 'срочный', 'личный', 'рабочий', 'общий',
+    'купить', 'позвонить', 'написать', 'проверить', 'отправить',
+    'забрать', 'записаться', 'обсудить', 'сделать', 'не', 'забыть',
+    'завтра', 'сегодня', 'потом', 'обязательно', 'быстро', 'ещё',
+)
+
+
+class SeedPlan:
+    """
+    Параметры генерации и начала диапазонов идентификаторов.
+
+    План передаётся в процессы-исполнители, поэтому всё, что считается
+    по базе, вычисляется один раз в основном процессе.
+    """
+
+    def __init__(self, seed, users, notes, batch_size, days, password,
+                 until):
+        self.seed = seed
+        self.counts = {USERS: users, NOTES: notes}
+        self.batch_size = batch_size
+        self.days = days
+        self.password = make_password(password)
+        # Даты отсчитываются от полуночи, а не от текущего момента,
+        # чтобы повторный запуск с тем же зерном давал те же данные.
+        self.now = timezone.make_aware(datetime.combine(until, time.min))
+        self.bases = {USERS: next_id(User), NOTES: next_id(Note)}
+
+    def batches(self, kind):
+        return range(-(-self.counts[kind] // self.batch_size))
+
+    def ids(self, kind, batch):
+        start = batch * self.batch_size
+        stop = min(start + self.batch_size, self.counts[kind])
+        return range(self.bases[kind] + start, self.bases[kind] + stop)
+
+
+def next_id(model):
+    return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def skewed(rng, size, power):
+    """Номер от 0 до size - 1, малые номера выпадают чаще."""
+    return int(size * rng.random() ** power)
+
+
+def phrase(rng, length):
+    return ' '.join(rng.choices(WORDS, k=length))
+
+
+def build_users(plan, batch, rng):
+    return [
+        User(pk=pk, username=f'seed{pk}', password=plan.password)
+        for pk in plan.ids(USERS, batch)
+    ]
+
+
+def build_notes(plan, batch, rng):
+    notes = []
+    for pk in plan.ids(NOTES, batch):
+        words = min(
+            int(rng.lognormvariate(TEXT_WORDS_MU, TEXT_WORDS_SIGMA)) + 1,
+            MAX_TEXT_WORDS,
+        )
+        notes.append(Note(
+            pk=pk,
+            title=phrase(rng, rng.randint(1, 6)).capitalize()[:100],
+            text=phrase(rng, words),
+            slug=f'seed-{pk}',
+            author_id=plan.bases[USERS] + skewed(
+                rng, plan.counts[USERS], HEAVY_AUTHOR_POWER
+            ),
+            modified=plan.now - timedelta(days=plan.days) * rng.random(),
+        ))
+    return notes
+
+
+BUILDERS = {
+    USERS: (User, build_users),
+    NOTES: (Note, build_notes),
+}
+# Блокировка записи, общая для процессов-исполнителей.
+write_lock = None
+
+
+def init_worker(lock):
+    global write_lock
+    write_lock = lock
+
+
+@contextmanager
+def explicit_timestamps(model):
+    """Не даёт auto_now и auto_now_add затереть сгенерированные даты."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed_batch(plan, kind, batch):
+    """Создаёт одну пачку объектов; возвращает их число."""
+    model, build = BUILDERS[kind]
+    rng = random.Random(f'{plan.seed}:{kind}:{batch}')
+    objects = build(plan, batch, rng)
+    with write_lock or nullcontext():
+        with transaction.atomic(), explicit_timestamps(model):
+            model.objects.bulk_create(objects)
+    return len(objects)
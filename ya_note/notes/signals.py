@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from yanote import metrics
+
+from .models import Note
+
+note_writes = metrics.Counter(
+    'note_writes_total', 'Записи заметок.', ('action',),
+)
+
+
+@receiver(post_save, sender=Note)
+def count_note_write(sender, instance, created, **kwargs):
+    note_writes.inc('created' if created else 'updated')
+
+
+@receiver(post_delete, sender=Note)
+def count_note_delete(sender, instance, **kwargs):
+    note_writes.inc('deleted')
@@ -0,0 +1,131 @@
+"""Подбор уникальных slug для заметок."""
+from functools import lru_cache
+
+from django.db import connection
+from pytils.translit import slugify
+from yanote.metrics import watch_lru_cache
+
+from .models import Note
+
+# Параметров запроса на одну основу в highest_suffixes.
+PARAMS_PER_STEM = 7
+# Место под суффикс вида «-123456» у длинных slug.
+SUFFIX_ROOM = 7
+
+
+@lru_cache(maxsize=4096)
+def transliterate(title):
+    """Slug из заголовка; одинаковые заголовки переводятся один раз."""
+    return slugify(title)
+
+
+watch_lru_cache('slugs', transliterate)
+
+
+def max_slug_length():
+    return Note._meta.get_field('slug').max_length
+
+
+def stem_of(slug):
+    """Часть slug, к которой добавляется суффикс «-N»."""
+    return slug[:max_slug_length() - SUFFIX_ROOM]
+
+
+def stems_per_query():
+    """Сколько основ помещается в запрос highest_suffixes."""
+    return connection.features.max_query_params // PARAMS_PER_STEM
+
+
+def highest_suffixes(stems, exclude_pk):
+    """
+    Наибольший числовой суффикс среди slug вида «основа-N» для каждой
+    основы из stems. Slug вроде «основа-2024-plan» не считаются: после
+    дефиса должны быть только цифры.
+
+    Запрос собирается вручную: построение такого же UNION из querysets
+    обходится дороже, чем его выполнение.
+    """
+    select = (
+        f'SELECT %s, MAX(CAST(SUBSTR(slug, %s) AS INTEGER)) '
+        f'FROM {Note._meta.db_table} '
+        f'WHERE slug >= %s AND slug < %s AND id <> %s '
+        f"AND SUBSTR(slug, %s) GLOB '[0-9]*' "
+        f"AND SUBSTR(slug, %s) NOT GLOB '*[^0-9]*'"
+    )
+    params = []
+    for stem in stems:
+        start = len(stem) + 2
+        params.extend((
+            stem, start, f'{stem}-', f'{stem}.', exclude_pk or 0,
+            start, start,
+        ))
+    with connection.cursor() as cursor:
+        cursor.execute(' UNION ALL '.join([select] * len(stems)), params)
+        return {
+            stem: top for stem, top in cursor.fetchall() if top is not None
+        }
+
+
+def unique_slugs(bases, exclude_pk=None):
+    """
+    Уникальные slug для списка желаемых, порядок сохраняется.
+
+    Свободная основа остаётся как есть, занятая получает следующий
+    после самого большого занятого суффикс: «-2», «-3» и так далее.
+    Повторы внутри списка тоже разводятся. На каждые stems_per_query()
+    основ нужно два запроса по уникальному индексу slug: какие основы
+    заняты и какой у каждой наибольший суффикс.
+    """
+    taken = set()
+    next_suffix = {}
+    per_query = stems_per_query()
+    stems = sorted({stem_of(base) for base in bases})
+    for start in range(0, len(stems), per_query):
+        chunk = stems[start:start + per_query]
+        for stem, top in highest_suffixes(chunk, exclude_pk).items():
+            next_suffix[stem] = max(top + 1, 2)
+    for start in range(0, len(bases), per_query):
+        queryset = Note.objects.filter(
+            slug__in=bases[start:start + per_query]
+        )
+        if exclude_pk is not None:
+            queryset = queryset.exclude(pk=exclude_pk)
+        taken.update(queryset.values_list('slug', flat=True))
+    slugs = []
+    for base in bases:
+        slug = base
+        if slug in taken:
+            stem = stem_of(base)
+            number = next_suffix.get(stem, 2)
+            slug = f'{stem}-{number}'
+            while slug in taken:
+                number += 1
+                slug = f'{stem}-{number}'
+            next_suffix[stem] = number + 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def unique_slug(base, exclude_pk=None):
+    return unique_slugs([base], exclude_pk)[0]
+
+
+def slug_from_title(title):
+    return transliterate(title)[:max_slug_length()]
+
+
+def assign_slugs(notes):
+    """
+    Проставляет уникальные slug заметкам перед bulk_create.
+
+    bulk_create не вызывает Note.save(), поэтому заметкам без slug
+    он берётся из заголовка, а совпадения с базой и между собой
+    получают суффиксы — всё за один проход.
+    """
+    slugs = unique_slugs([
+        note.slug or slug_from_title(note.title) for note in notes
+    ])
+    for note, slug in zip(notes, slugs):
+        note.slug = slug
+    return notes
@@ -0,0 +1,8 @@
+import pytest
+from django.conf import settings
+
+
+@pytest.fixture(autouse=True, scope='session')
+def metrics_dir(tmp_path_factory):
+    """Метрики тестовых запросов не должны попадать в каталог проекта."""
+    settings.METRICS_DIR = tmp_path_factory.mktemp('metrics')
@@ -0,0 +1,29 @@
+from yanote.middleware import query_budget
+
+
+class QueryBudgetMixin:
+    """Проверка бюджета SQL-запросов для тестов на TestCase."""
+
+    def assertWithinQueryBudget(self, response):  # noqa: N802
+        """
+        Проверяет, что ответ уложился в бюджет SQL-запросов.
+
+        Бюджет берётся из QUERY_BUDGETS по имени URL и методу запроса
+        (см. query_budget), число запросов — из заголовка, который ставит
+        QueryBudgetMiddleware. Повторять один и тот же запрос страница
+        не должна вовсе.
+        """
+        url_name = response.resolver_match.view_name
+        method = response.request['REQUEST_METHOD']
+        budget = query_budget(url_name, method)
+        if budget is None:
+            return
+        count = int(response['X-DB-Query-Count'])
+        self.assertLessEqual(
+            count, budget,
+            f'{url_name}: {count} SQL-запросов при бюджете {budget}',
+        )
+        duplicates = int(response['X-DB-Duplicate-Queries'])
+        self.assertEqual(
+            duplicates, 0, f'{url_name}: {duplicates} повторных SQL-запросов'
+        )
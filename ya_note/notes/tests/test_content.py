@@ -1,15 +1,27 @@
 from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from notes.models import Note
+from notes.tests.mixins import QueryBudgetMixin
+from yanote import metrics, profiling, warmup
+from yanote.middleware import ServerTimingViewMiddleware
 
 User = get_user_model()
 
 
-class BaseTest(TestCase):
+class BaseTest(QueryBudgetMixin, TestCase):
     """Базовый класс для тестов, содержащий общие данные и методы."""
 
     HOME_URL = reverse('notes:home')
@@ -67,6 +79,71 @@ class TestDetailPage(BaseTest):
         self.assertEqual(note.text, self.note.text)
         self.assertTemplateUsed(response, 'notes/detail.html')
 
+    def test_server_timing_splits_response_time(self):
+        """Server-Timing раскладывает время ответа по этапам без остатка."""
+        self.client.force_login(self.author)
+        response = self.client.get(self.detail_url)
+        durations = {}
+        for metric in response['Server-Timing'].split(', '):
+            name, duration, *desc = metric.split(';')
+            durations[name] = float(duration[len('dur='):])
+        self.assertEqual(
+            list(durations), ['url', 'view', 'db', 'tpl', 'mw', 'total']
+        )
+        self.assertGreater(durations['tpl'], 0)
+        parts = sum(durations.values()) - durations['total']
+        self.assertAlmostEqual(parts, durations['total'], delta=0.05)
+
+    def test_unchanged_note_is_not_modified(self):
+        """Проверяет, что неизменённая заметка отдаётся с кодом 304."""
+        self.client.force_login(self.author)
+        response = self.client.get(self.detail_url)
+        for header, value in (
+            ('HTTP_IF_NONE_MATCH', response['ETag']),
+            ('HTTP_IF_MODIFIED_SINCE', response['Last-Modified']),
+        ):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    self.detail_url, **{header: value}
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED.value
+                )
+
+    def test_not_modified_does_not_load_note(self):
+        """Проверяет, что для ответа 304 заметка целиком не загружается."""
+        self.client.force_login(self.author)
+        etag = self.client.get(self.detail_url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.detail_url, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED.value)
+        for query in queries:
+            self.assertNotIn('"notes_note"."text"', query['sql'])
+
+    def test_server_timing_marks_need_outer_middleware(self):
+        """Без ServerTimingMiddleware внутренние отметки не ломают запрос."""
+        request = RequestFactory().get('/')
+        with self.settings(SERVER_TIMING=True):
+            middleware = ServerTimingViewMiddleware(
+                lambda request: HttpResponse()
+            )
+        middleware.process_view(request, None, (), {})
+        middleware.process_template_response(request, HttpResponse())
+        self.assertEqual(
+            middleware(request).status_code, HTTPStatus.OK.value
+        )
+
+    def test_edited_note_is_modified(self):
+        """Проверяет, что после правки ETag заметки меняется."""
+        self.client.force_login(self.author)
+        etag = self.client.get(self.detail_url)['ETag']
+        self.note.text = 'Новый текст'
+        self.note.save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK.value)
+
 
 class TestNotesListPage(BaseTest):
     """Тесты для страницы списка заметок."""
@@ -76,6 +153,7 @@ class TestNotesListPage(BaseTest):
         self.client.force_login(self.author)
         response = self.client.get(self.LIST_URL)
         self.assertEqual(response.status_code, HTTPStatus.OK.value)
+        self.assertWithinQueryBudget(response)
         self.assertIn('object_list', response.context)
         self.assertIn(self.note, response.context['object_list'])
 
@@ -175,3 +253,152 @@ class TestNotePermissions(BaseTest):
         response = self.client.get(self.edit_url)
         self.assertEqual(response.status_code, HTTPStatus.OK.value)
         self.assertIn('form', response.context)
+
+
+class TestSearchPage(BaseTest):
+    """Тесты для поиска по заметкам."""
+
+    SEARCH_URL = reverse('notes:search')
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создает заметки разных авторов для поиска."""
+        super().setUpTestData()
+        cls.another_user = User.objects.create(username='Другой пользователь')
+        cls.title_match = Note.objects.create(
+            title='Рецепт борща', text='Свёкла и капуста', slug='borsch',
+            author=cls.author,
+        )
+        cls.text_match = Note.objects.create(
+            title='Покупки', text='Купить свёклу для борща', slug='shopping',
+            author=cls.author,
+        )
+        cls.foreign_match = Note.objects.create(
+            title='Борщ', text='Чужой рецепт', slug='foreign-borsch',
+            author=cls.another_user,
+        )
+
+    def test_search_ranks_own_notes(self):
+        """Находятся только свои заметки, совпадение в заголовке выше."""
+        self.client.force_login(self.author)
+        response = self.client.get(self.SEARCH_URL, {'q': 'борщ'})
+        self.assertEqual(
+            list(response.context['object_list']),
+            [self.title_match, self.text_match],
+        )
+
+    def test_search_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении заметок."""
+        self.client.force_login(self.author)
+        self.text_match.text = 'Купить хлеб'
+        self.text_match.save()
+        self.title_match.delete()
+        response = self.client.get(self.SEARCH_URL, {'q': 'борщ'})
+        self.assertEqual(list(response.context['object_list']), [])
+        response = self.client.get(self.SEARCH_URL, {'q': 'хлеб'})
+        self.assertEqual(
+            list(response.context['object_list']), [self.text_match]
+        )
+
+    def test_rebuild_index_command(self):
+        """Команда rebuild_notes_index восстанавливает индекс."""
+        call_command('rebuild_notes_index', stdout=StringIO())
+        self.client.force_login(self.author)
+        response = self.client.get(self.SEARCH_URL, {'q': 'капуста'})
+        self.assertEqual(
+            list(response.context['object_list']), [self.title_match]
+        )
+
+    def test_search_ignores_query_syntax(self):
+        """Операторы FTS5 в запросе не приводят к ошибке."""
+        self.client.force_login(self.author)
+        response = self.client.get(self.SEARCH_URL, {'q': '"NEAR( * -'})
+        self.assertEqual(response.status_code, HTTPStatus.OK.value)
+
+
+class TestWarmUp(SimpleTestCase):
+    """Тесты для прогрева процесса."""
+
+    def test_warm_up_compiles_every_template(self):
+        """Прогрев компилирует все шаблоны проекта."""
+        report = {name: count for name, _, count in warmup.warm_up()}
+        templates = list((settings.BASE_DIR / 'templates').rglob('*.html'))
+        self.assertEqual(report['templates'], len(templates))
+
+
+class TestSamplingProfiler(TestCase):
+    """Тесты для выборочного профилирования."""
+
+    def test_profiles_are_merged_by_route(self):
+        """Профили копятся по маршрутам и склеиваются profile_report."""
+        with TemporaryDirectory() as directory, self.settings(
+            PROFILE_SAMPLE_RATE=1, PROFILE_FLUSH_EVERY=1,
+            PROFILE_DIR=Path(directory),
+        ):
+            profiling.store.routes.clear()
+            self.addCleanup(profiling.store.routes.clear)
+            self.client.get(reverse('notes:home'))
+            self.client.get(reverse('notes:home'))
+            self.assertEqual(profiling.store.routes['notes:home'].samples, 2)
+            output = StringIO()
+            call_command('profile_report', 'notes:home', stdout=output)
+            self.assertIn('function calls', output.getvalue())
+
+    def test_off_by_default(self):
+        """С нулевой долей middleware не подключается."""
+        with self.assertRaises(MiddlewareNotUsed):
+            profiling.SamplingProfilerMiddleware(lambda request: None)
+
+
+class TestMetrics(BaseTest):
+    """Тесты для /metrics/."""
+
+    def scrape(self, **extra):
+        response = self.client.get(reverse('metrics'), **extra)
+        self.assertTrue(
+            response['Content-Type'].startswith('text/plain; version=0.0.4')
+        )
+        return dict(
+            line.rsplit(' ', 1)
+            for line in response.content.decode().splitlines()
+            if not line.startswith('#')
+        )
+
+    def test_metrics_are_summed_over_processes(self):
+        """Метрики всех процессов складываются в один ответ."""
+        self.client.force_login(self.author)
+        with TemporaryDirectory() as directory, self.settings(
+            METRICS_DIR=Path(directory),
+        ):
+            self.client.get(self.detail_url)
+            self.client.post(
+                self.ADD_URL, data={'title': 'Новая', 'text': 'Текст'}
+            )
+            before = self.scrape()
+            requests = (
+                'http_requests_total'
+                '{route="notes:detail",method="GET",status="200"}'
+            )
+            self.assertIn('note_writes_total{action="created"}', before)
+            self.assertIn(
+                'cache_requests_total{cache="slugs",result="miss"}', before
+            )
+            self.assertIn(
+                'db_queries_per_request_count{route="notes:detail"}', before
+            )
+            own = metrics.registry.path()
+            own.with_name('1000000000-other.json').write_text(own.read_text())
+            after = self.scrape()
+            self.assertEqual(
+                int(after[requests]), 2 * int(before[requests])
+            )
+            # Процесс, получивший тот же pid, не затирает файл прежнего.
+            metrics.registry.reset()
+            self.client.get(self.detail_url)
+            after = self.scrape()
+        self.assertEqual(int(after[requests]), 2 * int(before[requests]) + 1)
+
+    def test_metrics_are_not_public(self):
+        """Чужим адресам /metrics/ не отдаётся."""
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
@@ -1,16 +1,26 @@
+import json
+import sqlite3
+import tempfile
+from datetime import date
 from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
 
 from django.contrib.auth import get_user_model
-from django.db import IntegrityError
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
 from django.test import Client, TestCase
 from django.urls import reverse
 
 from notes.models import Note
+from notes.slugs import assign_slugs, stems_per_query
+from notes.tests.mixins import QueryBudgetMixin
 
 User = get_user_model()
 
 
-class NoteCreationTest(TestCase):
+class NoteCreationTest(QueryBudgetMixin, TestCase):
     """Тесты для создания заметки."""
 
     @classmethod
@@ -39,6 +49,7 @@ class NoteCreationTest(TestCase):
         initial_count = Note.objects.count()
         response = self.auth_client.post(self.url, data=self.form_data)
         self.assertRedirects(response, reverse('notes:success'))
+        self.assertWithinQueryBudget(response)
         self.assertEqual(Note.objects.count(), initial_count + 1)
         note = Note.objects.latest('id')
         self.assertEqual(note.title, self.form_data['title'])
@@ -53,8 +64,66 @@ class NoteCreationTest(TestCase):
                 title='Тест', text='Другой текст', author=self.user
             )
 
+    def test_same_title_gets_next_free_slug(self):
+        """Проверяет, что заметки с одним заголовком получают суффиксы."""
+        for expected_slug in ('novaya-zametka', 'novaya-zametka-2',
+                              'novaya-zametka-3'):
+            with self.subTest(slug=expected_slug):
+                self.auth_client.post(self.url, data=self.form_data)
+                self.assertEqual(
+                    Note.objects.latest('id').slug, expected_slug
+                )
 
-class NoteEditDeleteTest(TestCase):
+    def test_suffix_ignores_slugs_with_words_after_stem(self):
+        """Проверяет, что «основа-2024-plan» не считается суффиксом 2024."""
+        for slug in ('novaya-zametka', 'novaya-zametka-2024-plan'):
+            Note.objects.create(
+                title='Заметка', text='Текст', slug=slug, author=self.user
+            )
+        self.auth_client.post(self.url, data=self.form_data)
+        self.assertEqual(Note.objects.latest('id').slug, 'novaya-zametka-2')
+
+    def test_assign_slugs_for_bulk_create(self):
+        """Проверяет, что assign_slugs разводит slug пачки заметок."""
+        Note.objects.create(title='Тест', text='Текст', author=self.user)
+        notes = assign_slugs([
+            Note(title=title, text='Текст', author=self.user)
+            for title in ('Тест', 'Тест', 'Другой тест')
+        ])
+        Note.objects.bulk_create(notes)
+        self.assertEqual(
+            [note.slug for note in notes],
+            ['test-2', 'test-3', 'drugoj-test'],
+        )
+
+    @skipUnless(
+        hasattr(sqlite3.Connection, 'setlimit'), 'нужен Python 3.11+'
+    )
+    def test_assign_slugs_for_many_stems(self):
+        """Проверяет, что основы делятся на запросы по лимиту SQLite."""
+        slugs = [f'zametka{index}' for index in range(stems_per_query() + 1)]
+        Note.objects.bulk_create(
+            Note(title='Тест', text='Текст', slug=slug, author=self.user)
+            for slug in slugs
+        )
+        connection.ensure_connection()
+        limit = sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER
+        previous = connection.connection.setlimit(
+            limit, connection.features.max_query_params
+        )
+        try:
+            notes = assign_slugs([
+                Note(title='Тест', text='Текст', slug=slug, author=self.user)
+                for slug in slugs
+            ])
+        finally:
+            connection.connection.setlimit(limit, previous)
+        self.assertEqual(
+            [note.slug for note in notes], [f'{slug}-2' for slug in slugs]
+        )
+
+
+class NoteEditDeleteTest(QueryBudgetMixin, TestCase):
     """Тесты для редактирования и удаления заметок."""
 
     @classmethod
@@ -85,6 +154,7 @@ class NoteEditDeleteTest(TestCase):
         self.client.force_login(self.author)
         response = self.client.post(self.edit_url, data=self.form_data)
         self.assertRedirects(response, reverse('notes:success'))
+        self.assertWithinQueryBudget(response)
         self.note.refresh_from_db()
         self.assertEqual(self.note.title, self.updated_title)
         self.assertEqual(self.note.text, self.updated_text)
@@ -107,6 +177,7 @@ class NoteEditDeleteTest(TestCase):
         initial_count = Note.objects.count()
         response = self.client.post(self.delete_url)
         self.assertRedirects(response, reverse('notes:success'))
+        self.assertWithinQueryBudget(response)
         self.assertEqual(Note.objects.count(), initial_count - 1)
 
     def test_reader_cant_delete_note(self):
@@ -119,3 +190,88 @@ class NoteEditDeleteTest(TestCase):
         response = self.client.post(self.delete_url)
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND.value)
         self.assertEqual(Note.objects.count(), initial_count)
+
+
+class NoteImportExportTest(TestCase):
+    """Тесты для выгрузки и загрузки заметок в JSONL."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Создает заметки для выгрузки."""
+        cls.author = User.objects.create(username='author')
+        Note.objects.bulk_create(assign_slugs([
+            Note(title=f'Заметка {index}', text='Текст', author=cls.author)
+            for index in range(5)
+        ]))
+
+    def test_export_and_import_round_trip(self):
+        """Проверяет, что выгруженные заметки загружаются обратно."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.jsonl'
+            call_command(
+                'export_notes', output=str(path), stderr=StringIO()
+            )
+            records = [
+                json.loads(line)
+                for line in path.read_text(encoding='utf-8').splitlines()
+            ]
+            self.assertEqual(len(records), 5)
+            self.assertEqual(records[0]['author'], self.author.username)
+
+            call_command(
+                'import_notes', str(path), batch_size=2, stdout=StringIO()
+            )
+        self.assertEqual(Note.objects.count(), 10)
+        self.assertEqual(
+            Note.objects.values('slug').distinct().count(), 10
+        )
+
+    def test_export_to_command_stdout(self):
+        """Проверяет, что без --output заметки пишутся в stdout команды."""
+        output = StringIO()
+        call_command('export_notes', stdout=output, stderr=StringIO())
+        records = [
+            json.loads(line) for line in output.getvalue().splitlines()
+        ]
+        self.assertEqual(len(records), 5)
+
+    def test_import_rejects_invalid_records(self):
+        """Проверяет, что записи без заголовка и не объекты отклоняются."""
+        valid = json.dumps({
+            'title': 'Заметка', 'text': 'Текст', 'author': 'author',
+        })
+        for record in ({'text': 'Текст', 'author': 'author'},
+                       {'title': ' ', 'text': 'Текст', 'author': 'author'},
+                       ['Заметка', 'Текст'], 'Заметка'):
+            with self.subTest(record=record), \
+                    tempfile.TemporaryDirectory() as directory:
+                path = Path(directory) / 'notes.jsonl'
+                path.write_text(
+                    f'{valid}\n{json.dumps(record)}\n', encoding='utf-8'
+                )
+                with self.assertRaisesMessage(CommandError, 'Строка 2'):
+                    call_command('import_notes', str(path), stdout=StringIO())
+        self.assertEqual(Note.objects.count(), 5)
+
+
+class SeedCommandTest(TestCase):
+    """Тесты для команды seed."""
+
+    OPTIONS = dict(users=3, notes=20, batch_size=7, until=date(2024, 1, 1))
+
+    def test_seed_creates_notes(self):
+        """Проверяет, что seed создаёт пользователей и заметки."""
+        call_command('seed', stdout=StringIO(), **self.OPTIONS)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(Note.objects.count(), 20)
+
+    def test_seed_is_deterministic(self):
+        """Проверяет, что одно зерно даёт те же данные и при повторе."""
+        call_command('seed', stdout=StringIO(), **self.OPTIONS)
+        first = list(Note.objects.values_list('title', 'text', 'modified'))
+        User.objects.all().delete()
+        call_command('seed', stdout=StringIO(), **self.OPTIONS)
+        self.assertEqual(
+            list(Note.objects.values_list('title', 'text', 'modified')),
+            first,
+        )
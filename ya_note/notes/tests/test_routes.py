@@ -5,11 +5,12 @@ from django.test import TestCase
 from django.urls import reverse
 
 from notes.models import Note
+from notes.tests.mixins import QueryBudgetMixin
 
 User = get_user_model()
 
 
-class BaseTest(TestCase):
+class BaseTest(QueryBudgetMixin, TestCase):
     """Базовый класс для тестов, содержащий общие данные и методы."""
 
     HOME_URL = reverse('notes:home')
@@ -85,6 +86,8 @@ class TestNotePermissions(BaseTest):
         response_delete = self.client.get(self.delete_url)
         self.assertEqual(response_edit.status_code, HTTPStatus.OK.value)
         self.assertEqual(response_delete.status_code, HTTPStatus.OK.value)
+        self.assertWithinQueryBudget(response_edit)
+        self.assertWithinQueryBudget(response_delete)
 
     def test_another_user_cannot_edit_or_delete(self):
         """
@@ -184,6 +187,7 @@ class TestAuthenticatedAccess(BaseTest):
         self.client.force_login(self.author)
         response = self.client.get(self.LIST_URL)
         self.assertEqual(response.status_code, HTTPStatus.OK.value)
+        self.assertWithinQueryBudget(response)
 
     def test_authenticated_user_can_access_add_page(self):
         """
@@ -193,6 +197,7 @@ class TestAuthenticatedAccess(BaseTest):
         self.client.force_login(self.author)
         response = self.client.get(self.ADD_URL)
         self.assertEqual(response.status_code, HTTPStatus.OK.value)
+        self.assertWithinQueryBudget(response)
 
     def test_authenticated_user_can_access_success_page(self):
         """
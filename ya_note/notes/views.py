@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
+from yanote.mixins import ObjectCacheMixin
+from yanote.sqlite import atomic_with_retry
 
+from . import search
 from .forms import NoteForm
 from .models import Note
 
@@ -16,7 +22,7 @@ class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
     template_name = 'notes/success.html'
 
 
-class NoteBase(LoginRequiredMixin):
+class NoteBase(LoginRequiredMixin, ObjectCacheMixin):
     """Базовый класс для остальных CBV."""
     model = Note
     success_url = reverse_lazy('notes:success')
@@ -31,6 +37,7 @@ class NoteCreate(NoteBase, generic.CreateView):
     template_name = 'notes/form.html'
     form_class = NoteForm
 
+    @atomic_with_retry
     def form_valid(self, form):
         new_note = form.save(commit=False)
         new_note.author = self.request.user
@@ -43,17 +50,81 @@ class NoteUpdate(NoteBase, generic.UpdateView):
     template_name = 'notes/form.html'
     form_class = NoteForm
 
+    @atomic_with_retry
+    def form_valid(self, form):
+        return super().form_valid(form)
+
 
 class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
 
+    @atomic_with_retry
+    def delete(self, request, *args, **kwargs):
+        return super().delete(request, *args, **kwargs)
+
 
 class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        return super().get_queryset().order_by('id')
+
 
+class NoteSearch(NoteBase, generic.ListView):
+    """Поиск по заметкам пользователя, лучшие совпадения первыми."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        ids = search.search(
+            self.request.user.pk,
+            self.request.GET.get('q', ''),
+            settings.NOTES_SEARCH_LIMIT,
+        )
+        notes = super().get_queryset().in_bulk(ids)
+        return [notes[pk] for pk in ids if pk in notes]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        return context
+
+
+def note_validators(request, slug):
+    """
+    Первичный ключ и время изменения заметки пользователя.
+
+    Читаются только эти два поля и один раз на запрос к странице: они
+    нужны и для ETag, и для Last-Modified. Ответ 304 обходится без
+    загрузки самой заметки, её загружает get_object() страницы.
+    """
+    if not hasattr(request, 'note_validators'):
+        request.note_validators = None
+        if request.user.is_authenticated:
+            request.note_validators = Note.objects.filter(
+                slug=slug, author=request.user
+            ).values_list('pk', 'modified').first()
+    return request.note_validators
+
+
+def note_etag(request, slug):
+    validators = note_validators(request, slug)
+    if validators is None:
+        return None
+    pk, modified = validators
+    return f'{pk}-{modified.timestamp()}'
+
+
+def note_last_modified(request, slug):
+    validators = note_validators(request, slug)
+    return validators and validators[1]
+
+
+@method_decorator(
+    condition(etag_func=note_etag, last_modified_func=note_last_modified),
+    name='dispatch',
+)
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
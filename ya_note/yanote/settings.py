@@ -22,6 +22,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.profiling.SamplingProfilerMiddleware',
+    'yanote.middleware.ServerTimingMiddleware',
+    'yanote.metrics.MetricsMiddleware',
+    'yanote.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -29,6 +33,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yanote.middleware.ServerTimingViewMiddleware',
 ]
 
 ROOT_URLCONF = 'yanote.urls'
@@ -50,6 +55,22 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yanote.wsgi.application'
+# Прогревать ли процесс при загрузке yanote.wsgi, см. yanote/warmup.py.
+WARMUP_ON_START = not DEBUG
+# Выборочное профилирование, см. yanote/profiling.py; 0 — выключено.
+PROFILE_SAMPLE_RATE = 0.0
+PROFILE_SAMPLE_INTERVAL = 0.001
+PROFILE_FLUSH_EVERY = 20
+PROFILE_MAX_STACKS = 5000
+PROFILE_DIR = BASE_DIR / 'profiles'
+# Заголовок Server-Timing и, по желанию, строка в логе yanote.timing.
+SERVER_TIMING = True
+SERVER_TIMING_LOG = False
+# Метрики Prometheus, см. yanote/metrics.py: каталог с файлами
+# процессов, как часто их переписывать и кому отдавать /metrics/.
+METRICS_DIR = BASE_DIR / 'metrics'
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
 
 
 DATABASES = {
@@ -59,6 +80,25 @@ DATABASES = {
     }
 }
 
+# PRAGMA для каждого нового соединения с SQLite, см. yanote/sqlite.py.
+# cache_size отрицательный — размер в КиБ, а не в страницах.
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+}
+SQLITE_PROFILE = 'production'
+# Сколько раз повторить транзакцию записи, если база занята,
+# и начальная пауза в секундах; каждая следующая вдвое длиннее.
+SQLITE_WRITE_RETRIES = 5
+SQLITE_RETRY_DELAY = 0.02
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -70,6 +110,33 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # INFO — строка на каждый запрос, WARNING — только превышения
+        # бюджета.
+        'yanote.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+        'yanote.warmup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'yanote.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+
 LANGUAGE_CODE = 'ru'
 
 TIME_ZONE = 'Europe/Moscow'
@@ -87,3 +154,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+NOTES_SEARCH_LIMIT = 50
+
+# Сколько SQL-запросов может сделать страница; проверяется тестами.
+# Имя URL — бюджет GET, пара (имя URL, метод) — остальных методов.
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 3,
+    'notes:detail': 4,
+    'notes:add': 2,
+    ('notes:add', 'POST'): 9,
+    'notes:edit': 3,
+    ('notes:edit', 'POST'): 9,
+    'notes:delete': 3,
+    ('notes:delete', 'POST'): 6,
+    'notes:search': 4,
+    'notes:success': 2,
+}